@@ -4,201 +4,504 @@ BBS Door Games Web Interface
 A web-based interface for classic BBS door games
 """
 
-from flask import Flask, render_template, request, session, jsonify, redirect, url_for
-from flask_socketio import SocketIO, emit, join_room, leave_room
-import json
+# eventlet must patch the standard library before anything else is imported
+import eventlet
+eventlet.monkey_patch()
+
+from flask import Flask, Response, render_template, request, redirect, url_for
+from flask_socketio import SocketIO, Namespace, emit
+import hashlib
+import logging
 import os
-import threading
+import pathlib
 import time
-import uuid
-from datetime import datetime
 
-# Import our game classes
-import sys
-sys.path.append('games')
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import BBS functionality
 from bbs_web import WebBBSManager
 
+class OrjsonPacketCodec:
+    """json-module shim so Socket.IO packets are encoded with orjson"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        # orjson output is already compact; the separators argument
+        # python-socketio passes is not needed
+        return orjson.dumps(obj).decode('utf-8')
+    
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        return orjson.loads(data)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'bbs-door-games-secret-key-change-in-production'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio_options = {}
+if orjson is not None:
+    socketio_options['json'] = OrjsonPacketCodec
+# Setting BBS_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) lets several
+# workers share socket traffic. Game sessions still live in process memory,
+# so the load balancer must keep each client on the same worker.
+# Banner-heavy game output compresses well, so compress any polling payload
+# over 256 bytes rather than the 1 KB default. Engine.IO only compresses
+# the HTTP polling transport; it has no websocket permessage-deflate option.
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet',
+                    message_queue=os.environ.get('BBS_MESSAGE_QUEUE'),
+                    compression_threshold=256, **socketio_options)
+logger = logging.getLogger(__name__)
 
 # Store active game sessions
 active_sessions = {}
-player_data_dir = "player_data"
+# Remote address of each BBS client, captured once on bbs_connect
+bbs_client_ips = {}
+PLAYER_DATA_DIR = pathlib.Path("player_data")
+
+# Idle game sessions are reaped so dropped connections don't leak
+SESSION_IDLE_TIMEOUT = 1800  # 30 minutes
+SESSION_REAP_INTERVAL = 60
+
+# Released game sessions are kept for reuse, up to this many
+SESSION_POOL_LIMIT = 1024
+_session_pool = []
 
 # Initialize BBS manager
 bbs_manager = WebBBSManager()
 
-if not os.path.exists(player_data_dir):
-    os.makedirs(player_data_dir)
+os.makedirs(PLAYER_DATA_DIR, exist_ok=True)
 
 class WebGameSession:
     """Base class for web-based game sessions"""
+    __slots__ = ('session_id', 'player_name', 'game_type', 'output_buffer',
+                 'waiting_for_input', 'input_prompt', 'prompt_dirty', 'game_state',
+                 'last_activity')
+    
     def __init__(self, session_id, player_name, game_type):
+        self.output_buffer = []
+        self.reset(session_id, player_name, game_type)
+    
+    def reset(self, session_id, player_name, game_type):
+        """Reinitialise this session in place for a new player"""
         self.session_id = session_id
         self.player_name = player_name
         self.game_type = game_type
-        self.output_buffer = []
+        self.output_buffer.clear()
         self.waiting_for_input = False
         self.input_prompt = ""
+        self.prompt_dirty = False
         self.game_state = "menu"
-        self.last_activity = datetime.now()
+        self.last_activity = time.monotonic()
     
-    def add_output(self, text):
-        """Add text to output buffer"""
-        self.output_buffer.append({
-            'text': text,
-            'timestamp': datetime.now().isoformat()
-        })
-        self.last_activity = datetime.now()
+    def add_output(self, *lines):
+        """Add one or more lines to output buffer"""
+        self.output_buffer.extend(lines)
     
     def get_output(self):
-        """Get and clear output buffer"""
-        output = self.output_buffer.copy()
-        self.output_buffer.clear()
-        return output
+        """Get and clear output buffer as a single multi-line frame"""
+        buffer, self.output_buffer = self.output_buffer, []
+        self.last_activity = time.monotonic()
+        return '\n'.join(buffer)
     
     def set_input_prompt(self, prompt):
         """Set the current input prompt"""
+        if prompt != self.input_prompt or not self.waiting_for_input:
+            self.prompt_dirty = True
         self.input_prompt = prompt
         self.waiting_for_input = True
 
+def acquire_session(session_id, player_name, game_type):
+    """Get a game session, reusing a pooled instance when available"""
+    if _session_pool:
+        game_session = _session_pool.pop()
+        game_session.reset(session_id, player_name, game_type)
+        return game_session
+    return WebGameSession(session_id, player_name, game_type)
+
+def release_session(session_id):
+    """Remove a game session and return it to the pool"""
+    game_session = active_sessions.pop(session_id, None)
+    if game_session is not None and len(_session_pool) < SESSION_POOL_LIMIT:
+        game_session.output_buffer.clear()
+        _session_pool.append(game_session)
+
+class GameSpec:
+    """Static description of a web game: intro text and command table"""
+    __slots__ = ('start_screen', 'commands', 'help_line')
+    
+    def __init__(self, banner, welcome, intro, commands, help_line):
+        # Whole intro screen as one template; only {name} varies per session
+        self.start_screen = "\n".join((banner, welcome, intro))
+        self.commands = commands
+        self.help_line = help_line
+
+# Game intro text, built once at import instead of per session
+HR = "=" * 60
+
+PIT_BANNER = "\n".join((
+    f"\n{HR}",
+    "               THE PIT - GLADIATOR ARENA",
+    "               Fight! Survive! Conquer!",
+    HR,
+))
+PIT_INTRO = "\n".join((
+    "\nThis is a simplified web version of The Pit.",
+    "Available commands: fight, stats, shop, quit",
+))
+
+GALACTIC_BANNER = "\n".join((
+    f"\n{HR}",
+    "           GALACTIC CONQUEST - SPACE TRADER",
+    "         Buy Low, Sell High, Rule the Galaxy!",
+    HR,
+))
+GALACTIC_INTRO = "\n".join((
+    "You start with 2000 credits on Earth.",
+    "\nCommands: trade, travel, status, quit",
+))
+
+HILO_BANNER = "\n".join((
+    f"\n{HR}",
+    "              HI-LO CASINO - NUMBER GUESSING",
+    "              Guess the number, win big!",
+    HR,
+))
+HILO_INTRO = "\n".join((
+    "You start with 1,000 credits.",
+    "\nCommands: play, stats, rules, quit",
+))
+
+TRADE_WARS_BANNER = "\n".join((
+    f"\n{HR}",
+    "                    T R A D E   W A R S",
+    "                 Space Conquest & Trading",
+    HR,
+    "",
+    "The year is 2391. Humanity has spread across the galaxy",
+    "in a network of interconnected space lanes. You are a",
+    "trader, warrior, and explorer in this vast frontier.",
+    "",
+    "Your mission: Build an empire among the stars!",
+    "",
+    "Commands:",
+    "  [M]ove to sector    [T]rade at port     [P]lanet operations",
+    "  [A]ttack fighters   [D]eploy fighters   [S]can sector",
+    "  [C]omputer          [R]eport            [Q]uit game",
+    "",
+    "Loading commander profile...",
+))
+TRADE_WARS_INTRO = "\n".join((
+    "Starting in Sector 1 with basic ship and 5000 credits.",
+    "",
+))
+
+def _response(*lines, ends_game=False):
+    """Build a command table entry: (pre-joined text, needs player name, ends game)"""
+    text = "\n".join(lines)
+    return text, '{name}' in text, ends_game
+
+# Per-command responses for the simplified web versions of each game
+PIT_COMMANDS = {
+    'fight': _response(
+        "\n🗡️  You enter the arena!",
+        "A goblin appears! You strike it down!",
+        "🎉 Victory! You gain 25 experience and 15 gold!",
+    ),
+    'stats': _response(
+        "\n📊 GLADIATOR STATS",
+        "Name: {name}",
+        "Level: 1 | Health: 100/100",
+        "Gold: 115 | Wins: 1",
+    ),
+    'shop': _response(
+        "\n🏪 WEAPON SHOP",
+        "1. Iron Sword - 50 gold",
+        "2. Leather Armor - 40 gold",
+        "(Shop functionality simplified for web demo)",
+    ),
+    'quit': _response("\n👋 Thanks for playing The Pit!", ends_game=True),
+}
+PIT_HELP = "Available: fight, stats, shop, quit"
+
+GALACTIC_COMMANDS = {
+    'trade': _response(
+        "\n📊 EARTH MARKET",
+        "Food: 8 credits | Medicine: 45 credits",
+        "(Trading simplified for web demo)",
+    ),
+    'travel': _response(
+        "\n🚀 DESTINATIONS",
+        "1. Mars (5 fuel) - Minerals, Machinery",
+        "2. Alpha Centauri (15 fuel) - Electronics",
+        "(Travel simplified for web demo)",
+    ),
+    'status': _response(
+        "\n💰 CAPTAIN STATUS",
+        "Captain: {name}",
+        "Credits: 2,000 | Location: Earth",
+        "Fuel: 100/100 | Cargo: 0/50",
+    ),
+    'quit': _response("\n👋 Safe travels, Captain!", ends_game=True),
+}
+GALACTIC_HELP = "Available: trade, travel, status, quit"
+
+HILO_COMMANDS = {
+    'play': _response(
+        "\n🎲 NEW GAME",
+        "I'm thinking of a number between 1 and 100",
+        "Bet: 100 credits (simplified for demo)",
+        "\nThe number was 42! You won 300 credits!",
+    ),
+    'stats': _response(
+        "\n📈 PLAYER STATISTICS",
+        "Player: {name}",
+        "Credits: 1,300 | Games: 1 | Wins: 1",
+        "Win Rate: 100% | Streak: 1",
+    ),
+    'rules': _response(
+        "\n📜 GAME RULES",
+        "1. Choose difficulty (affects payout)",
+        "2. Place your bet",
+        "3. Guess the secret number",
+        "4. Win based on difficulty and speed",
+    ),
+    'quit': _response("\n👋 Thanks for playing Hi-Lo Casino!", ends_game=True),
+}
+HILO_HELP = "Available: play, stats, rules, quit"
+
+TRADE_WARS_COMMANDS = {
+    'move': _response(
+        "\n🚀 SECTOR MOVEMENT",
+        "Available warp gates from Sector 1:",
+        "  1. Sector 2 (Port: Stardock)",
+        "  2. Sector 5 (Planet: Earth Prime)",
+        "  3. Sector 7 (Empty space)",
+        "\nMoved to Sector 2 - Stardock Trading Post",
+    ),
+    'trade': _response(
+        "\n🏪 STARDOCK TRADING POST",
+        "Available goods:",
+        "  Fuel Ore: 15 credits/unit",
+        "  Organics: 25 credits/unit",
+        "Your credits: 5,000 | Cargo space: 20/20 holds",
+        "\nPurchased 10 Fuel Ore for 150 credits!",
+    ),
+    'planet': _response(
+        "\n🌍 PLANET OPERATIONS",
+        "Planet: Earth Prime (Class M)",
+        "Status: Unexplored - Available for colonization",
+        "Cost: 10,000 credits",
+        "\nNeed more credits to colonize this planet.",
+    ),
+    'attack': _response(
+        "\n⚔️  COMBAT ENGAGEMENT",
+        "Scanning for enemy fighters...",
+        "No enemy forces detected in this sector.",
+    ),
+    'scan': _response(
+        "\n🔍 LONG RANGE SCAN",
+        "Adjacent sectors:",
+        "  Sector 1: Starting point",
+        "  Sector 3: Port(Ore Refinery)",
+        "  Sector 4: Planet(Mining Colony)",
+        "  Sector 6: Fighters(15)",
+    ),
+    'report': _response(
+        "\n📄 COMMANDER REPORT",
+        "Commander: {name}",
+        "Rank: Harmless",
+        "Credits: 4,850 | Experience: 0",
+        "Planets Owned: 0 | Sectors Controlled: 0",
+        "Ship: Merchant Cruiser | Fighters: 10",
+    ),
+    'computer': _response(
+        "\n💻 SHIP COMPUTER",
+        "Trade Wars Database Online",
+        "\nRecommended trade routes:",
+        "  - Buy Fuel Ore (15cr) -> Sell to Stardock (20cr)",
+        "  - Buy Organics (25cr) -> Sell to Industrial (35cr)",
+        "  - Buy Equipment (50cr) -> Sell to Agricultural (75cr)",
+    ),
+    'quit': _response(
+        "\n👋 Thanks for playing Trade Wars!",
+        "Your progress has been saved.",
+        "May the stars guide your journey, Commander!",
+        ends_game=True,
+    ),
+}
+# Single-letter aliases: [M]ove, [T]rade, [P]lanet, ...
+TRADE_WARS_COMMANDS.update({cmd[0]: response for cmd, response in list(TRADE_WARS_COMMANDS.items())})
+TRADE_WARS_HELP = "Available: [M]ove, [T]rade, [P]lanet, [A]ttack, [S]can, [R]eport, [C]omputer, [Q]uit"
+
+GAME_SPECS = {
+    'the_pit': GameSpec(PIT_BANNER, "\nWelcome, {name}!", PIT_INTRO,
+                        PIT_COMMANDS, PIT_HELP),
+    'galactic_conquest': GameSpec(GALACTIC_BANNER, "\nWelcome, Captain {name}!", GALACTIC_INTRO,
+                                  GALACTIC_COMMANDS, GALACTIC_HELP),
+    'hilo_casino': GameSpec(HILO_BANNER, "\nWelcome to the casino, {name}!", HILO_INTRO,
+                            HILO_COMMANDS, HILO_HELP),
+    'trade_wars': GameSpec(TRADE_WARS_BANNER, "Welcome back, Commander {name}!", TRADE_WARS_INTRO,
+                           TRADE_WARS_COMMANDS, TRADE_WARS_HELP),
+}
+
+# Game catalogue shown on the index and game pages
+GAMES_LIST = (
+    {
+        'id': 'the_pit',
+        'name': 'The Pit',
+        'description': 'Gladiator Combat Arena - Fight monsters, gain experience, and climb the ranks!',
+        'genre': 'Combat/RPG',
+        'difficulty': 'Medium'
+    },
+    {
+        'id': 'galactic_conquest',
+        'name': 'Galactic Conquest',
+        'description': 'Space Trading Game - Buy low, sell high, and rule the galaxy!',
+        'genre': 'Trading/Strategy',
+        'difficulty': 'Hard'
+    },
+    {
+        'id': 'hilo_casino',
+        'name': 'Hi-Lo Casino',
+        'description': 'Number Guessing Game - Guess the number, win big!',
+        'genre': 'Casino/Luck',
+        'difficulty': 'Easy'
+    },
+    {
+        'id': 'trade_wars',
+        'name': 'Trade Wars',
+        'description': 'Classic Space Trading & Conquest - Build an empire among the stars!',
+        'genre': 'Trading/Strategy',
+        'difficulty': 'Hard'
+    },
+)
+
+GAME_INFO = {
+    'the_pit': {
+        'name': 'The Pit',
+        'description': 'Gladiator Combat Arena'
+    },
+    'galactic_conquest': {
+        'name': 'Galactic Conquest',
+        'description': 'Space Trading Game'
+    },
+    'hilo_casino': {
+        'name': 'Hi-Lo Casino',
+        'description': 'Number Guessing Game'
+    },
+    'trade_wars': {
+        'name': 'Trade Wars',
+        'description': 'Classic Space Trading & Conquest'
+    }
+}
+
+VALID_GAMES = frozenset(GAME_INFO)
+
+# Rendered bodies and ETags for pages whose content never changes
+_page_cache = {}
+
+def render_static_page(template_name, **context):
+    """Render a fixed page once, then serve the cached bytes with an ETag"""
+    page = _page_cache.get(template_name)
+    if page is None:
+        body = render_template(template_name, **context).encode('utf-8')
+        page = _page_cache[template_name] = (body, hashlib.sha1(body).hexdigest())
+    body, etag = page
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Main page showing available games"""
-    games = [
-        {
-            'id': 'the_pit',
-            'name': 'The Pit',
-            'description': 'Gladiator Combat Arena - Fight monsters, gain experience, and climb the ranks!',
-            'genre': 'Combat/RPG',
-            'difficulty': 'Medium'
-        },
-        {
-            'id': 'galactic_conquest',
-            'name': 'Galactic Conquest',
-            'description': 'Space Trading Game - Buy low, sell high, and rule the galaxy!',
-            'genre': 'Trading/Strategy',
-            'difficulty': 'Hard'
-        },
-        {
-            'id': 'hilo_casino',
-            'name': 'Hi-Lo Casino',
-            'description': 'Number Guessing Game - Guess the number, win big!',
-            'genre': 'Casino/Luck',
-            'difficulty': 'Easy'
-        },
-        {
-            'id': 'trade_wars',
-            'name': 'Trade Wars',
-            'description': 'Classic Space Trading & Conquest - Build an empire among the stars!',
-            'genre': 'Trading/Strategy',
-            'difficulty': 'Hard'
-        }
-    ]
-    return render_template('index.html', games=games)
+    return render_static_page('index.html', games=GAMES_LIST)
 
 @app.route('/game/<game_id>')
 def game_page(game_id):
     """Game interface page"""
-    valid_games = ['the_pit', 'galactic_conquest', 'hilo_casino', 'trade_wars']
-    if game_id not in valid_games:
+    if game_id not in VALID_GAMES:
         return redirect(url_for('index'))
     
-    game_info = {
-        'the_pit': {
-            'name': 'The Pit',
-            'description': 'Gladiator Combat Arena'
-        },
-        'galactic_conquest': {
-            'name': 'Galactic Conquest',
-            'description': 'Space Trading Game'
-        },
-        'hilo_casino': {
-            'name': 'Hi-Lo Casino',
-            'description': 'Number Guessing Game'
-        },
-        'trade_wars': {
-            'name': 'Trade Wars',
-            'description': 'Classic Space Trading & Conquest'
-        }
-    }
-    
     return render_template('game.html', 
                          game_id=game_id, 
-                         game_info=game_info[game_id])
+                         game_info=GAME_INFO[game_id])
 
 @app.route('/bbs')
 def bbs_page():
     """BBS interface page"""
-    return render_template('bbs.html')
+    return render_static_page('bbs.html')
 
 @app.route('/about')
 def about():
     """About page with BBS history"""
-    return render_template('about.html')
+    return render_static_page('about.html')
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    print(f"Client connected: {request.sid}")
+    logger.debug("Client connected: %s", request.sid)
     emit('connected', {'status': 'Connected to BBS Door Games'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     session_id = request.sid
-    if session_id in active_sessions:
-        del active_sessions[session_id]
-    print(f"Client disconnected: {session_id}")
+    # The default namespace now only carries the BBS terminal
+    bbs_manager.end_session(session_id)
+    bbs_client_ips.pop(session_id, None)
+    logger.debug("Client disconnected: %s", session_id)
 
-@socketio.on('start_game')
-def handle_start_game(data):
-    """Start a new game session"""
-    session_id = request.sid
-    game_id = data.get('game_id')
-    player_name = data.get('player_name', 'Anonymous')
-    
-    # Create new game session
-    game_session = WebGameSession(session_id, player_name, game_id)
-    active_sessions[session_id] = game_session
+
+class GameNamespace(Namespace):
+    """Socket.IO namespace for one game (e.g. /the_pit)
     
-    # Start the appropriate game
-    if game_id == 'the_pit':
-        start_pit_game(session_id, player_name)
-    elif game_id == 'galactic_conquest':
-        start_galactic_game(session_id, player_name)
-    elif game_id == 'hilo_casino':
-        start_hilo_game(session_id, player_name)
-    elif game_id == 'trade_wars':
-        start_trade_wars_game(session_id, player_name)
+    Each game gets its own namespace, so the event router picks the game
+    and handlers never branch on the session's game type.
+    """
     
+    def __init__(self, game_id, spec):
+        super().__init__('/' + game_id)
+        self.game_id = game_id
+        self.spec = spec
     
-    emit('game_started', {'game_id': game_id, 'player_name': player_name})
-
-@socketio.on('game_input')
-def handle_game_input(data):
-    """Handle input from the game interface"""
-    session_id = request.sid
-    user_input = data.get('input', '')
+    def on_connect(self):
+        """Handle client connection"""
+        logger.debug("Client connected to %s: %s", self.namespace, request.sid)
+        emit('connected', {'status': 'Connected to BBS Door Games'})
     
-    if session_id not in active_sessions:
-        emit('error', {'message': 'No active game session'})
-        return
+    def on_disconnect(self):
+        """Handle client disconnection"""
+        session_id = request.sid
+        release_session(session_id)
+        logger.debug("Client disconnected from %s: %s", self.namespace, session_id)
     
-    game_session = active_sessions[session_id]
+    def on_start_game(self, data):
+        """Start a new game session"""
+        session_id = request.sid
+        player_name = data.get('player_name', 'Anonymous')
+        
+        # Create new game session, recycling any previous one for this client
+        release_session(session_id)
+        game_session = acquire_session(session_id, player_name, self.game_id)
+        active_sessions[session_id] = game_session
+        
+        start_game(game_session, self.spec)
+        
+        emit('game_started', {'game_id': self.game_id, 'player_name': player_name})
     
-    # Process input based on game type
-    if game_session.game_type == 'the_pit':
-        process_pit_input(session_id, user_input)
-    elif game_session.game_type == 'galactic_conquest':
-        process_galactic_input(session_id, user_input)
-    elif game_session.game_type == 'hilo_casino':
-        process_hilo_input(session_id, user_input)
-    elif game_session.game_type == 'trade_wars':
-        process_trade_wars_input(session_id, user_input)
+    def on_game_input(self, data):
+        """Handle input from the game interface"""
+        game_session = active_sessions.get(request.sid)
+        
+        if game_session is None:
+            emit('error', {'message': 'No active game session'})
+            return
+        
+        process_command(game_session, data.get('input', ''), self.spec)
+
+for game_id, spec in GAME_SPECS.items():
+    socketio.on_namespace(GameNamespace(game_id, spec))
 
 
 # BBS Socket Handlers
@@ -207,13 +510,15 @@ def handle_bbs_input(data):
     """Handle input from the BBS interface"""
     session_id = request.sid
     user_input = data.get('input', '')
-    ip_address = request.environ.get('REMOTE_ADDR', '127.0.0.1')
+    ip_address = bbs_client_ips.get(session_id)
+    if ip_address is None:
+        ip_address = request.environ.get('REMOTE_ADDR', '127.0.0.1')
     
     try:
         response = bbs_manager.process_input(session_id, ip_address, user_input)
         emit('bbs_output', response)
     except Exception as e:
-        print(f"BBS error: {e}")
+        logger.error("BBS error: %s", e)
         emit('bbs_error', {'message': 'BBS system error'})
 
 @socketio.on('bbs_connect')
@@ -221,13 +526,14 @@ def handle_bbs_connect():
     """Handle BBS connection"""
     session_id = request.sid
     ip_address = request.environ.get('REMOTE_ADDR', '127.0.0.1')
+    bbs_client_ips[session_id] = ip_address
     
     try:
         # Get initial BBS screen
         response = bbs_manager.process_input(session_id, ip_address, '')
         emit('bbs_output', response)
     except Exception as e:
-        print(f"BBS connection error: {e}")
+        logger.error("BBS connection error: %s", e)
         emit('bbs_error', {'message': 'Failed to connect to BBS'})
 
 @socketio.on('bbs_disconnect')
@@ -235,253 +541,74 @@ def handle_bbs_disconnect():
     """Handle BBS disconnection"""
     session_id = request.sid
     bbs_manager.end_session(session_id)
+    bbs_client_ips.pop(session_id, None)
 
-def start_pit_game(session_id, player_name):
-    """Start The Pit game"""
-    game_session = active_sessions[session_id]
-    game_session.add_output("\n" + "="*60)
-    game_session.add_output("               THE PIT - GLADIATOR ARENA")
-    game_session.add_output("               Fight! Survive! Conquer!")
-    game_session.add_output("="*60)
-    game_session.add_output(f"\nWelcome, {player_name}!")
-    game_session.add_output("\nThis is a simplified web version of The Pit.")
-    game_session.add_output("Available commands: fight, stats, shop, quit")
+def start_game(game_session, spec):
+    """Send a game's intro screen to a new session"""
+    game_session.add_output(spec.start_screen.format(name=game_session.player_name))
     game_session.set_input_prompt("Enter command: ")
     
-    # Send initial output
-    emit_game_output(session_id)
+    emit_game_output(game_session)
 
-def process_pit_input(session_id, user_input):
-    """Process input for The Pit game"""
-    game_session = active_sessions[session_id]
-    cmd = user_input.lower().strip()
+def process_command(game_session, user_input, spec):
+    """Process input for a game using its command response table"""
+    cmd = user_input.strip()
+    if not cmd.islower():
+        cmd = cmd.lower()
     
-    if cmd == 'fight':
-        game_session.add_output("\n🗡️  You enter the arena!")
-        game_session.add_output("A goblin appears! You strike it down!")
-        game_session.add_output("🎉 Victory! You gain 25 experience and 15 gold!")
-    elif cmd == 'stats':
-        game_session.add_output("\n📊 GLADIATOR STATS")
-        game_session.add_output(f"Name: {game_session.player_name}")
-        game_session.add_output("Level: 1 | Health: 100/100")
-        game_session.add_output("Gold: 115 | Wins: 1")
-    elif cmd == 'shop':
-        game_session.add_output("\n🏪 WEAPON SHOP")
-        game_session.add_output("1. Iron Sword - 50 gold")
-        game_session.add_output("2. Leather Armor - 40 gold")
-        game_session.add_output("(Shop functionality simplified for web demo)")
-    elif cmd == 'quit':
-        game_session.add_output("\n👋 Thanks for playing The Pit!")
-        game_session.game_state = "ended"
+    response = spec.commands.get(cmd)
+    if response is None:
+        game_session.add_output(f"\nUnknown command: {user_input}", spec.help_line)
     else:
-        game_session.add_output(f"\nUnknown command: {user_input}")
-        game_session.add_output("Available: fight, stats, shop, quit")
+        text, needs_name, ends_game = response
+        if needs_name:
+            text = text.format(name=game_session.player_name)
+        game_session.add_output(text)
+        if ends_game:
+            game_session.game_state = "ended"
     
     if game_session.game_state != "ended":
         game_session.set_input_prompt("Enter command: ")
     
-    emit_game_output(session_id)
-
-def start_galactic_game(session_id, player_name):
-    """Start Galactic Conquest game"""
-    game_session = active_sessions[session_id]
-    game_session.add_output("\n" + "="*60)
-    game_session.add_output("           GALACTIC CONQUEST - SPACE TRADER")
-    game_session.add_output("         Buy Low, Sell High, Rule the Galaxy!")
-    game_session.add_output("="*60)
-    game_session.add_output(f"\nWelcome, Captain {player_name}!")
-    game_session.add_output("You start with 2000 credits on Earth.")
-    game_session.add_output("\nCommands: trade, travel, status, quit")
-    game_session.set_input_prompt("Enter command: ")
-    
-    emit_game_output(session_id)
-
-def process_galactic_input(session_id, user_input):
-    """Process input for Galactic Conquest"""
-    game_session = active_sessions[session_id]
-    cmd = user_input.lower().strip()
-    
-    if cmd == 'trade':
-        game_session.add_output("\n📊 EARTH MARKET")
-        game_session.add_output("Food: 8 credits | Medicine: 45 credits")
-        game_session.add_output("(Trading simplified for web demo)")
-    elif cmd == 'travel':
-        game_session.add_output("\n🚀 DESTINATIONS")
-        game_session.add_output("1. Mars (5 fuel) - Minerals, Machinery")
-        game_session.add_output("2. Alpha Centauri (15 fuel) - Electronics")
-        game_session.add_output("(Travel simplified for web demo)")
-    elif cmd == 'status':
-        game_session.add_output("\n💰 CAPTAIN STATUS")
-        game_session.add_output(f"Captain: {game_session.player_name}")
-        game_session.add_output("Credits: 2,000 | Location: Earth")
-        game_session.add_output("Fuel: 100/100 | Cargo: 0/50")
-    elif cmd == 'quit':
-        game_session.add_output("\n👋 Safe travels, Captain!")
-        game_session.game_state = "ended"
-    else:
-        game_session.add_output(f"\nUnknown command: {user_input}")
-        game_session.add_output("Available: trade, travel, status, quit")
-    
-    if game_session.game_state != "ended":
-        game_session.set_input_prompt("Enter command: ")
-    
-    emit_game_output(session_id)
-
-def start_hilo_game(session_id, player_name):
-    """Start Hi-Lo Casino game"""
-    game_session = active_sessions[session_id]
-    game_session.add_output("\n" + "="*60)
-    game_session.add_output("              HI-LO CASINO - NUMBER GUESSING")
-    game_session.add_output("              Guess the number, win big!")
-    game_session.add_output("="*60)
-    game_session.add_output(f"\nWelcome to the casino, {player_name}!")
-    game_session.add_output("You start with 1,000 credits.")
-    game_session.add_output("\nCommands: play, stats, rules, quit")
-    game_session.set_input_prompt("Enter command: ")
-    
-    emit_game_output(session_id)
-
-def process_hilo_input(session_id, user_input):
-    """Process input for Hi-Lo Casino"""
-    game_session = active_sessions[session_id]
-    cmd = user_input.lower().strip()
-    
-    if cmd == 'play':
-        game_session.add_output("\n🎲 NEW GAME")
-        game_session.add_output("I'm thinking of a number between 1 and 100")
-        game_session.add_output("Bet: 100 credits (simplified for demo)")
-        game_session.add_output("\nThe number was 42! You won 300 credits!")
-    elif cmd == 'stats':
-        game_session.add_output("\n📈 PLAYER STATISTICS")
-        game_session.add_output(f"Player: {game_session.player_name}")
-        game_session.add_output("Credits: 1,300 | Games: 1 | Wins: 1")
-        game_session.add_output("Win Rate: 100% | Streak: 1")
-    elif cmd == 'rules':
-        game_session.add_output("\n📜 GAME RULES")
-        game_session.add_output("1. Choose difficulty (affects payout)")
-        game_session.add_output("2. Place your bet")
-        game_session.add_output("3. Guess the secret number")
-        game_session.add_output("4. Win based on difficulty and speed")
-    elif cmd == 'quit':
-        game_session.add_output("\n👋 Thanks for playing Hi-Lo Casino!")
-        game_session.game_state = "ended"
-    else:
-        game_session.add_output(f"\nUnknown command: {user_input}")
-        game_session.add_output("Available: play, stats, rules, quit")
-    
-    if game_session.game_state != "ended":
-        game_session.set_input_prompt("Enter command: ")
-    
-    emit_game_output(session_id)
-
-
-def start_trade_wars_game(session_id, player_name):
-    """Start Trade Wars game"""
-    game_session = active_sessions[session_id]
-    game_session.add_output("\n" + "="*60)
-    game_session.add_output("                    T R A D E   W A R S")
-    game_session.add_output("                 Space Conquest & Trading")
-    game_session.add_output("=" * 60)
-    game_session.add_output("")
-    game_session.add_output("The year is 2391. Humanity has spread across the galaxy")
-    game_session.add_output("in a network of interconnected space lanes. You are a")
-    game_session.add_output("trader, warrior, and explorer in this vast frontier.")
-    game_session.add_output("")
-    game_session.add_output("Your mission: Build an empire among the stars!")
-    game_session.add_output("")
-    game_session.add_output("Commands:")
-    game_session.add_output("  [M]ove to sector    [T]rade at port     [P]lanet operations")
-    game_session.add_output("  [A]ttack fighters   [D]eploy fighters   [S]can sector")
-    game_session.add_output("  [C]omputer          [R]eport            [Q]uit game")
-    game_session.add_output("")
-    game_session.add_output("Loading commander profile...")
-    game_session.add_output(f"Welcome back, Commander {player_name}!")
-    game_session.add_output("Starting in Sector 1 with basic ship and 5000 credits.")
-    game_session.add_output("")
-    game_session.set_input_prompt("Enter command: ")
-
-def process_trade_wars_input(session_id, user_input):
-    """Process input for Trade Wars"""
-    game_session = active_sessions[session_id]
-    cmd = user_input.lower().strip()
-    
-    if cmd in ['m', 'move']:
-        game_session.add_output("\n🚀 SECTOR MOVEMENT")
-        game_session.add_output("Available warp gates from Sector 1:")
-        game_session.add_output("  1. Sector 2 (Port: Stardock)")
-        game_session.add_output("  2. Sector 5 (Planet: Earth Prime)")
-        game_session.add_output("  3. Sector 7 (Empty space)")
-        game_session.add_output("\nMoved to Sector 2 - Stardock Trading Post")
-    elif cmd in ['t', 'trade']:
-        game_session.add_output("\n🏪 STARDOCK TRADING POST")
-        game_session.add_output("Available goods:")
-        game_session.add_output("  Fuel Ore: 15 credits/unit")
-        game_session.add_output("  Organics: 25 credits/unit")
-        game_session.add_output("Your credits: 5,000 | Cargo space: 20/20 holds")
-        game_session.add_output("\nPurchased 10 Fuel Ore for 150 credits!")
-    elif cmd in ['p', 'planet']:
-        game_session.add_output("\n🌍 PLANET OPERATIONS")
-        game_session.add_output("Planet: Earth Prime (Class M)")
-        game_session.add_output("Status: Unexplored - Available for colonization")
-        game_session.add_output("Cost: 10,000 credits")
-        game_session.add_output("\nNeed more credits to colonize this planet.")
-    elif cmd in ['a', 'attack']:
-        game_session.add_output("\n⚔️  COMBAT ENGAGEMENT")
-        game_session.add_output("Scanning for enemy fighters...")
-        game_session.add_output("No enemy forces detected in this sector.")
-    elif cmd in ['s', 'scan']:
-        game_session.add_output("\n🔍 LONG RANGE SCAN")
-        game_session.add_output("Adjacent sectors:")
-        game_session.add_output("  Sector 1: Starting point")
-        game_session.add_output("  Sector 3: Port(Ore Refinery)")
-        game_session.add_output("  Sector 4: Planet(Mining Colony)")
-        game_session.add_output("  Sector 6: Fighters(15)")
-    elif cmd in ['r', 'report']:
-        game_session.add_output("\n📄 COMMANDER REPORT")
-        game_session.add_output(f"Commander: {game_session.player_name}")
-        game_session.add_output("Rank: Harmless")
-        game_session.add_output("Credits: 4,850 | Experience: 0")
-        game_session.add_output("Planets Owned: 0 | Sectors Controlled: 0")
-        game_session.add_output("Ship: Merchant Cruiser | Fighters: 10")
-    elif cmd in ['c', 'computer']:
-        game_session.add_output("\n💻 SHIP COMPUTER")
-        game_session.add_output("Trade Wars Database Online")
-        game_session.add_output("\nRecommended trade routes:")
-        game_session.add_output("  - Buy Fuel Ore (15cr) -> Sell to Stardock (20cr)")
-        game_session.add_output("  - Buy Organics (25cr) -> Sell to Industrial (35cr)")
-        game_session.add_output("  - Buy Equipment (50cr) -> Sell to Agricultural (75cr)")
-    elif cmd in ['q', 'quit']:
-        game_session.add_output("\n👋 Thanks for playing Trade Wars!")
-        game_session.add_output("Your progress has been saved.")
-        game_session.add_output("May the stars guide your journey, Commander!")
-        game_session.game_state = "ended"
-    else:
-        game_session.add_output(f"\nUnknown command: {user_input}")
-        game_session.add_output("Available: [M]ove, [T]rade, [P]lanet, [A]ttack, [S]can, [R]eport, [C]omputer, [Q]uit")
-    
-    if game_session.game_state != "ended":
-        game_session.set_input_prompt("Enter command: ")
-    
-    emit_game_output(session_id)
+    emit_game_output(game_session)
 
 
-def emit_game_output(session_id):
-    """Send game output to client"""
-    if session_id not in active_sessions:
+def emit_game_output(game_session):
+    """Send game output to the session's client"""
+    # Nothing new to show and the prompt is unchanged: skip the frame
+    if not game_session.output_buffer and not game_session.prompt_dirty:
         return
     
-    game_session = active_sessions[session_id]
+    game_session.prompt_dirty = False
     output = game_session.get_output()
     
-    socketio.emit('game_output', {
+    # The client is always connected to this worker, so go straight to the
+    # Socket.IO server and bypass Flask-SocketIO's context lookups and the
+    # message queue
+    socketio.server.emit('game_output', {
         'output': output,
         'prompt': game_session.input_prompt,
         'waiting_for_input': game_session.waiting_for_input,
         'game_state': game_session.game_state
-    }, room=session_id)
+    }, to=game_session.session_id, namespace='/' + game_session.game_type,
+       ignore_queue=True)
+
+def reap_idle_sessions():
+    """Background task that drops game sessions idle past the timeout"""
+    while True:
+        socketio.sleep(SESSION_REAP_INTERVAL)
+        now = time.monotonic()
+        expired = [sid for sid, game_session in active_sessions.items()
+                   if now - game_session.last_activity > SESSION_IDLE_TIMEOUT]
+        for sid in expired:
+            release_session(sid)
+
+socketio.start_background_task(reap_idle_sessions)
 
 if __name__ == '__main__':
     print("Starting BBS Door Games Web Server...")
     print("Visit http://localhost:5001 to play!")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5001)
+    # Development launch only; in production run under
+    #   gunicorn -k eventlet -w 1 app:app
+    socketio.run(app, host='0.0.0.0', port=5001, debug=False)
 
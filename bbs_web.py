@@ -5,6 +5,7 @@ Integrates the secure BBS functionality into the web application
 """
 
 import re
+import heapq
 import hashlib
 import secrets
 import time
@@ -12,17 +13,272 @@ import sqlite3
 import html
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Dict, List, Tuple
 
-# Import BBS classes from the bbs_server module
-import sys
-import os
-sys.path.append('bbs_server')
+# Import BBS classes from the secure BBS server module
 from secure_bbs import SecurityValidator, RateLimiter, BBSDatabase
 
+# (epoch second, formatted string) for the last call to timestamp_now
+_timestamp_cache = [0, '']
+
+def timestamp_now() -> str:
+    """Current local time as YYYY-MM-DD HH:MM:SS, formatted at most once a second"""
+    now = int(time.time())
+    if now != _timestamp_cache[0]:
+        _timestamp_cache[0] = now
+        _timestamp_cache[1] = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+    return _timestamp_cache[1]
+
+@lru_cache(maxsize=4096)
+def format_short_date(posted_at: str) -> str:
+    """Format a message timestamp for the message list"""
+    try:
+        return datetime.fromisoformat(posted_at.replace('Z', '+00:00')).strftime("%m/%d %H:%M")
+    except (AttributeError, ValueError):
+        return "Unknown"
+
+@lru_cache(maxsize=4096)
+def format_long_date(posted_at: str) -> str:
+    """Format a message timestamp for the message header"""
+    try:
+        msg_time = datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
+        return msg_time.strftime("%A, %B %d, %Y at %I:%M %p")
+    except (AttributeError, ValueError):
+        return "Unknown date"
+
 class WebBBSSession:
     """Web-based BBS session handler"""
     
+    __slots__ = (
+        'session_id', 'ip_address', 'database', 'rate_limiter',
+        'username', 'authenticated', 'current_menu', 'last_activity',
+        'login_attempts', 'max_login_attempts', 'login_timeout', 'idle_timeout',
+        'registration_state', 'temp_data', 'login_step',
+        'message_area', 'message_state', 'temp_message',
+    )
+    
+    # Input handler for each menu; anything else falls back to the main menu
+    MENU_HANDLERS = {
+        'login': 'handle_login',
+        'register': 'handle_registration',
+        'main': 'handle_main_menu',
+        'messages': 'handle_message_area',
+        'users': 'handle_user_list',
+        'help': 'handle_help',
+        'doors': 'handle_door_games',
+    }
+    
+    # Main menu commands that open a submenu: (menu, handler)
+    MAIN_MENU_TARGETS = {
+        'M': ('messages', 'handle_message_area'),
+        'MESSAGES': ('messages', 'handle_message_area'),
+        'MESSAGE': ('messages', 'handle_message_area'),
+        '1': ('messages', 'handle_message_area'),
+        'D': ('doors', 'handle_door_games'),
+        'DOORS': ('doors', 'handle_door_games'),
+        'DOOR': ('doors', 'handle_door_games'),
+        'GAMES': ('doors', 'handle_door_games'),
+        '2': ('doors', 'handle_door_games'),
+        'U': ('users', 'handle_user_list'),
+        'USERS': ('users', 'handle_user_list'),
+        'USER': ('users', 'handle_user_list'),
+        '3': ('users', 'handle_user_list'),
+        'H': ('help', 'handle_help'),
+        'HELP': ('help', 'handle_help'),
+        '?': ('help', 'handle_help'),
+        '4': ('help', 'handle_help'),
+    }
+    QUIT_COMMANDS = frozenset({'Q', 'QUIT', 'EXIT', 'LOGOFF', 'BYE'})
+    TIME_COMMANDS = frozenset({'T', 'TIME', '5'})
+    
+    MESSAGE_MENU_ITEMS = (
+        "-"*50,
+        "",
+        "  [1] General Discussion",
+        "  [2] Gaming Talk",
+        "  [3] Technical Support",
+        "  [4] Announcements (Read Only)",
+        "",
+        "  [R]ead Messages",
+        "  [P]ost New Message",
+        "  [B]ack to Main Menu",
+        "",
+    )
+    
+    POST_MESSAGE_ITEMS = (
+        "-" * 50,
+        "",
+        "Enter a subject for your message (max 100 characters):",
+        "(Type CANCEL to abort)",
+        "",
+    )
+    
+    # Input handler for each message area state:
+    #   menu    - area menu
+    #   view    - message list
+    #   reading - a message is shown; any input returns to the list
+    #   post    - composing a new message (subject/body step in temp_message)
+    #   posted  - post confirmation; any input returns to the area menu
+    MESSAGE_STATE_HANDLERS = {
+        'menu': 'show_message_menu',
+        'view': 'handle_view_messages',
+        'reading': 'finish_reading',
+        'post': 'handle_post_message',
+        'posted': 'finish_posting',
+    }
+    
+    # Message area selected by each number on the message menu
+    MESSAGE_AREAS = {
+        '1': 'General',
+        '2': 'Gaming',
+        '3': 'Technical',
+        '4': 'Announcements',
+    }
+    
+    # Static screens, built once rather than on every visit
+    DOOR_GAMES_SCREEN = (
+        '',
+        "-"*40,
+        "  DOOR GAMES AVAILABLE",
+        "-"*40,
+        "",
+        "  [1] The Pit - Gladiator Combat",
+        "  [2] Galactic Conquest - Space Trading",
+        "  [3] Hi-Lo Casino - Number Guessing",
+        "",
+        "  [B]ack to Main Menu",
+        "",
+        "Note: Games launch in the main web interface.",
+        "Use the 'Games' section to play door games.",
+    )
+    
+    HELP_SCREEN = (
+        '',
+        "-"*50,
+        "  HELP - BBS COMMANDS",
+        "-"*50,
+        "",
+        "  Navigation:",
+        "    - Enter menu numbers (1, 2, 3...) or letters (M, D, U...)",
+        "    - Commands are case-insensitive",
+        "    - Type B or BACK to go back in menus",
+        "",
+        "  Security Features:",
+        "    - All input is validated and sanitized",
+        "    - Rate limiting prevents abuse",
+        "    - Failed login attempts are logged",
+        "    - Sessions timeout after 30 minutes of inactivity",
+        "",
+        "  Available Areas:",
+        "    - Messages: Read and post messages (coming soon)",
+        "    - Door Games: Information about available games",
+        "    - User List: See who's on the system",
+        "",
+        "  Note: For full game experience, use the main web interface.",
+        "  This BBS interface provides classic text-only navigation.",
+    )
+    
+    # Fixed responses shared by every session; callers must treat them as
+    # read-only
+    DOOR_GAMES_RESPONSE = {
+        'output': DOOR_GAMES_SCREEN,
+        'prompt': 'Enter choice:',
+        'clear_screen': True,
+        'menu': 'doors'
+    }
+    DOOR_GAME_RESPONSES = {
+        '1': {
+            'output': (
+                'The Pit - Gladiator Combat Arena',
+                '',
+                'To play this game, visit the main web interface',
+                'and select "The Pit" from the games menu.',
+                '',
+                'This provides the full interactive experience',
+                'with real-time combat and character progression.'
+            ),
+            'prompt': 'Press Enter to continue...',
+            'clear_screen': False,
+            'menu': 'doors'
+        },
+        '2': {
+            'output': (
+                'Galactic Conquest - Space Trading Game',
+                '',
+                'To play this game, visit the main web interface',
+                'and select "Galactic Conquest" from the games menu.',
+                '',
+                'Trade across the galaxy and build your fortune!'
+            ),
+            'prompt': 'Press Enter to continue...',
+            'clear_screen': False,
+            'menu': 'doors'
+        },
+        '3': {
+            'output': (
+                'Hi-Lo Casino - Number Guessing Game',
+                '',
+                'To play this game, visit the main web interface',
+                'and select "Hi-Lo Casino" from the games menu.',
+                '',
+                'Test your luck and win big!'
+            ),
+            'prompt': 'Press Enter to continue...',
+            'clear_screen': False,
+            'menu': 'doors'
+        },
+    }
+    INVALID_DOOR_RESPONSE = {
+        'output': ('Invalid selection.',),
+        'prompt': 'Enter choice:',
+        'clear_screen': False,
+        'menu': 'doors'
+    }
+    HELP_RESPONSE = {
+        'output': HELP_SCREEN,
+        'prompt': 'Press Enter to continue...',
+        'clear_screen': True,
+        'menu': 'help'
+    }
+    
+    MAIN_MENU_ITEMS = (
+        "-"*40,
+        "",
+        "  [1] (M)essage Areas",
+        "  [2] (D)oor Games",
+        "  [3] (U)ser List",
+        "  [4] (H)elp",
+        "  [5] (T)ime",
+        "  [Q]uit",
+        "",
+    )
+    
+    # Hot message queries, kept as constants so the statement cache always
+    # sees the same SQL text
+    LIST_MESSAGES_SQL = (
+        "SELECT id, from_user, subject, posted_at FROM messages "
+        "WHERE message_area = ? ORDER BY posted_at DESC LIMIT 20"
+    )
+    READ_MESSAGE_SQL = (
+        "SELECT from_user, to_user, subject, body, posted_at FROM messages "
+        "WHERE id = ? AND message_area = ?"
+    )
+    
+    # Fixed lines around the per-connection timestamp on the login banner
+    LOGIN_BANNER_HEAD = (
+        "",
+        "=" * 60,
+        "             SECURE TEXT BBS - RETRO COMPUTING",
+    )
+    LOGIN_BANNER_TAIL = (
+        "=" * 60,
+        "",
+        "Welcome to a secure, text-only bulletin board system!",
+        "All input is validated and logged for security.",
+        "",
+    )
+    
     def __init__(self, session_id: str, ip_address: str, database, rate_limiter):
         self.session_id = session_id
         self.ip_address = ip_address
@@ -42,6 +298,12 @@ class WebBBSSession:
         # State for multi-step processes
         self.registration_state = {}
         self.temp_data = {}
+        self.login_step = 'banner'
+        
+        # Message area state
+        self.message_area = 'General'
+        self.message_state = 'menu'
+        self.temp_message = {}
     
     def is_session_valid(self) -> bool:
         """Check if session is still valid"""
@@ -57,6 +319,13 @@ class WebBBSSession:
         
         return True
     
+    @property
+    def expiry_time(self) -> float:
+        """Time at which is_session_valid() starts returning False"""
+        if self.authenticated:
+            return self.last_activity + self.idle_timeout
+        return self.last_activity + min(self.login_timeout, self.idle_timeout)
+    
     def update_activity(self):
         """Update last activity timestamp"""
         self.last_activity = time.time()
@@ -65,8 +334,9 @@ class WebBBSSession:
         """Process user input and return response"""
         self.update_activity()
         
-        # Check rate limiting
-        if self.rate_limiter.is_rate_limited(self.ip_address):
+        # Check rate limiting and count this command in one step
+        allowed, _ = self.rate_limiter.check_and_record_command(self.ip_address)
+        if not allowed:
             return {
                 'output': ['Rate limit exceeded. Please slow down.'],
                 'prompt': 'Press Enter to continue...',
@@ -74,48 +344,25 @@ class WebBBSSession:
                 'menu': self.current_menu
             }
         
-        self.rate_limiter.record_command(self.ip_address)
-        
         # Validate and sanitize input
         if user_input:
             user_input = SecurityValidator.sanitize_text(user_input, 100)
         
         # Route to appropriate handler based on current menu
-        if self.current_menu == "login":
-            return self.handle_login(user_input)
-        elif self.current_menu == "register":
-            return self.handle_registration(user_input)
-        elif self.current_menu == "main":
-            return self.handle_main_menu(user_input)
-        elif self.current_menu == "messages":
-            return self.handle_message_area(user_input)
-        elif self.current_menu == "users":
-            return self.handle_user_list(user_input)
-        elif self.current_menu == "help":
-            return self.handle_help(user_input)
-        elif self.current_menu == "doors":
-            return self.handle_door_games(user_input)
-        else:
+        handler = self.MENU_HANDLERS.get(self.current_menu)
+        if handler is None:
             return self.show_main_menu()
+        return getattr(self, handler)(user_input)
     
     def handle_login(self, user_input: str) -> Dict:
         """Handle login process"""
-        if not hasattr(self, 'login_step'):
-            self.login_step = 'banner'
-        
         if self.login_step == 'banner':
             self.login_step = 'username'
             return {
                 'output': [
-                    "",
-                    "" + "="*60,
-                    "             SECURE TEXT BBS - RETRO COMPUTING",
-                    "                Connected at " + datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "" + "="*60,
-                    "",
-                    "Welcome to a secure, text-only bulletin board system!",
-                    "All input is validated and logged for security.",
-                    "",
+                    *self.LOGIN_BANNER_HEAD,
+                    "                Connected at " + timestamp_now(),
+                    *self.LOGIN_BANNER_TAIL,
                 ],
                 'prompt': 'Enter username (3-20 chars, letters/numbers/underscore only):',
                 'clear_screen': True,
@@ -298,7 +545,16 @@ class WebBBSSession:
             }
         
         elif step == 'real_name':
-            real_name = SecurityValidator.sanitize_text(user_input or '', SecurityValidator.MAX_REALNAME)
+            # Input was sanitized in process_input. Check the length rather
+            # than slicing, which could cut an HTML entity in half
+            real_name = user_input.strip()
+            if len(real_name) > SecurityValidator.MAX_REALNAME:
+                return {
+                    'output': [f'Real name too long (max {SecurityValidator.MAX_REALNAME} characters).'],
+                    'prompt': 'Enter your real name (optional, press Enter to skip):',
+                    'clear_screen': False,
+                    'menu': 'register'
+                }
             self.registration_state['real_name'] = real_name
             self.registration_state['step'] = 'location'
             return {
@@ -309,7 +565,14 @@ class WebBBSSession:
             }
         
         elif step == 'location':
-            location = SecurityValidator.sanitize_text(user_input or '', SecurityValidator.MAX_LOCATION)
+            location = user_input.strip()
+            if len(location) > SecurityValidator.MAX_LOCATION:
+                return {
+                    'output': [f'Location too long (max {SecurityValidator.MAX_LOCATION} characters).'],
+                    'prompt': 'Enter your location (optional, press Enter to skip):',
+                    'clear_screen': False,
+                    'menu': 'register'
+                }
             
             # Create the user account
             username = self.registration_state['username']
@@ -359,20 +622,12 @@ class WebBBSSession:
                 ''
             ])
         
-        output.extend([
+        output.extend((
             '',
             "-"*40,
             f"  MAIN MENU - User: {self.username}",
-            "-"*40,
-            "",
-            "  [1] (M)essage Areas",
-            "  [2] (D)oor Games",
-            "  [3] (U)ser List",
-            "  [4] (H)elp",
-            "  [5] (T)ime",
-            "  [Q]uit",
-            "",
-        ])
+            *self.MAIN_MENU_ITEMS,
+        ))
         
         return {
             'output': output,
@@ -397,7 +652,7 @@ class WebBBSSession:
             }
         
         # Process command
-        if validated_cmd in ['Q', 'QUIT', 'EXIT', 'LOGOFF', 'BYE']:
+        if validated_cmd in self.QUIT_COMMANDS:
             return {
                 'output': [
                     'Thank you for using our BBS.',
@@ -409,45 +664,38 @@ class WebBBSSession:
                 'menu': 'main',
                 'session_ended': True
             }
-        elif validated_cmd in ['M', 'MESSAGES', 'MESSAGE', '1']:
-            self.current_menu = 'messages'
-            return self.handle_message_area('')
-        elif validated_cmd in ['D', 'DOORS', 'DOOR', 'GAMES', '2']:
-            self.current_menu = 'doors'
-            return self.handle_door_games('')
-        elif validated_cmd in ['U', 'USERS', 'USER', '3']:
-            self.current_menu = 'users'
-            return self.handle_user_list('')
-        elif validated_cmd in ['H', 'HELP', '?', '4']:
-            self.current_menu = 'help'
-            return self.handle_help('')
-        elif validated_cmd in ['T', 'TIME', '5']:
+        if validated_cmd in self.TIME_COMMANDS:
             return self.show_time()
-        else:
+        
+        target = self.MAIN_MENU_TARGETS.get(validated_cmd)
+        if target is None:
             return {
                 'output': ['Command not implemented yet.'],
                 'prompt': 'Enter command:',
                 'clear_screen': False,
                 'menu': 'main'
             }
+        
+        self.current_menu, handler = target
+        return getattr(self, handler)('')
     
     def handle_message_area(self, user_input: str) -> Dict:
         """Handle message area"""
-        if not hasattr(self, 'message_area'):
-            self.message_area = 'General'
-        
-        if not hasattr(self, 'message_state'):
-            self.message_state = 'menu'
-        
-        if self.message_state == 'menu':
-            return self.show_message_menu(user_input)
-        elif self.message_state == 'view':
-            return self.handle_view_messages(user_input)
-        elif self.message_state == 'post':
-            return self.handle_post_message(user_input)
-        else:
+        handler = self.MESSAGE_STATE_HANDLERS.get(self.message_state)
+        if handler is None:
             self.message_state = 'menu'
             return self.show_message_menu('')
+        return getattr(self, handler)(user_input)
+    
+    def finish_reading(self, user_input: str) -> Dict:
+        """Return to the message list after reading a message"""
+        self.message_state = 'view'
+        return self.handle_view_messages('')
+    
+    def finish_posting(self, user_input: str) -> Dict:
+        """Return to the area menu after posting a message"""
+        self.message_state = 'menu'
+        return self.show_message_menu('')
     
     def show_message_menu(self, user_input: str) -> Dict:
         """Show message area main menu"""
@@ -457,41 +705,24 @@ class WebBBSSession:
                     '',
                     "-"*50,
                     f"  MESSAGE AREAS - {self.message_area}",
-                    "-"*50,
-                    "",
-                    "  [1] General Discussion",
-                    "  [2] Gaming Talk",
-                    "  [3] Technical Support",
-                    "  [4] Announcements (Read Only)",
-                    "",
-                    "  [R]ead Messages",
-                    "  [P]ost New Message",
-                    "  [B]ack to Main Menu",
-                    "",
+                    *self.MESSAGE_MENU_ITEMS,
                 ],
                 'prompt': 'Enter choice:',
                 'clear_screen': True,
                 'menu': 'messages'
             }
         
-        if user_input.upper() in ['B', 'BACK']:
-            return self.show_main_menu()
-        elif user_input in ['1']:
-            self.message_area = 'General'
-            return self.show_message_menu('')
-        elif user_input in ['2']:
-            self.message_area = 'Gaming'
-            return self.show_message_menu('')
-        elif user_input in ['3']:
-            self.message_area = 'Technical'
-            return self.show_message_menu('')
-        elif user_input in ['4']:
-            self.message_area = 'Announcements'
+        choice = user_input.upper()
+        area = self.MESSAGE_AREAS.get(choice)
+        if area is not None:
+            self.message_area = area
             return self.show_message_menu('')
-        elif user_input.upper() in ['R', 'READ']:
+        elif choice in ('B', 'BACK'):
+            return self.show_main_menu()
+        elif choice in ('R', 'READ'):
             self.message_state = 'view'
             return self.handle_view_messages('')
-        elif user_input.upper() in ['P', 'POST']:
+        elif choice in ('P', 'POST'):
             if self.message_area == 'Announcements':
                 return {
                     'output': ['Announcements area is read-only.'],
@@ -512,74 +743,13 @@ class WebBBSSession:
     
     def handle_view_messages(self, user_input: str) -> Dict:
         """Handle viewing messages"""
-        # Check if we're returning from reading a message or any continue prompt
-        if hasattr(self, 'reading_message') and self.reading_message:
-            self.reading_message = False
-            # Return to message list
-            return self.handle_view_messages('')
-        
-        # Check if returning from posting continuation
-        if hasattr(self, 'post_continue') and self.post_continue:
-            self.post_continue = False
-            self.message_state = 'menu'
-            return self.show_message_menu('')
-        
         if not user_input:
             # Get messages from database
             try:
-                with sqlite3.connect(self.database.db_path) as conn:
-                    cursor = conn.execute(
-                        "SELECT id, from_user, subject, posted_at FROM messages WHERE message_area = ? ORDER BY posted_at DESC LIMIT 20",
-                        (self.message_area,)
-                    )
+                with self.database.acquire() as conn:
+                    cursor = conn.execute(self.LIST_MESSAGES_SQL, (self.message_area,))
                     messages = cursor.fetchall()
-                
-                output = [
-                    '',
-                    "-"*60,
-                    f"  MESSAGES - {self.message_area} Discussion",
-                    "-"*60,
-                    "",
-                ]
-                
-                if messages:
-                    output.append(f"{'#':<3} {'From':<15} {'Subject':<25} {'Date':<15}")
-                    output.append("-" * 60)
-                    
-                    for msg_id, from_user, subject, posted_at in messages:
-                        # Truncate long subjects
-                        if len(subject) > 22:
-                            subject = subject[:19] + "..."
-                        
-                        # Format date
-                        try:
-                            msg_time = datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
-                            date_str = msg_time.strftime("%m/%d %H:%M")
-                        except:
-                            date_str = "Unknown"
-                        
-                        output.append(f"{msg_id:<3} {from_user:<15} {subject:<25} {date_str:<15}")
-                    
-                    output.extend([
-                        "",
-                        "Enter message number to read, or:",
-                    ])
-                else:
-                    output.append("No messages in this area yet.")
-                    output.append("")
-                
-                output.extend([
-                    "[P]ost New Message | [B]ack to Menu",
-                    ""
-                ])
-                
-                return {
-                    'output': output,
-                    'prompt': 'Enter choice:',
-                    'clear_screen': True,
-                    'menu': 'messages'
-                }
-            except Exception as e:
+            except sqlite3.Error:
                 return {
                     'output': [
                         'Error retrieving messages.',
@@ -589,6 +759,48 @@ class WebBBSSession:
                     'clear_screen': True,
                     'menu': 'messages'
                 }
+            
+            output = [
+                '',
+                "-"*60,
+                f"  MESSAGES - {self.message_area} Discussion",
+                "-"*60,
+                "",
+            ]
+            
+            if messages:
+                output.append(f"{'#':<3} {'From':<15} {'Subject':<25} {'Date':<15}")
+                output.append("-" * 60)
+                
+                # Long subjects are truncated to fit the column
+                output.extend(
+                    "%-3s %-15s %-25s %-15s" % (
+                        msg_id, from_user,
+                        subject if len(subject) <= 22 else subject[:19] + "...",
+                        format_short_date(posted_at),
+                    )
+                    for msg_id, from_user, subject, posted_at in messages
+                )
+                
+                output.extend([
+                    "",
+                    "Enter message number to read, or:",
+                ])
+            else:
+                output.append("No messages in this area yet.")
+                output.append("")
+            
+            output.extend([
+                "[P]ost New Message | [B]ack to Menu",
+                ""
+            ])
+            
+            return {
+                'output': output,
+                'prompt': 'Enter choice:',
+                'clear_screen': True,
+                'menu': 'messages'
+            }
         
         if user_input.upper() in ['B', 'BACK']:
             self.message_state = 'menu'
@@ -609,7 +821,7 @@ class WebBBSSession:
             # Try to read a specific message
             try:
                 msg_id = int(user_input)
-                self.reading_message = True
+                self.message_state = 'reading'
                 return self.read_message(msg_id)
             except ValueError:
                 return {
@@ -622,82 +834,65 @@ class WebBBSSession:
     def read_message(self, msg_id: int) -> Dict:
         """Read a specific message"""
         try:
-            with sqlite3.connect(self.database.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT from_user, to_user, subject, body, posted_at FROM messages WHERE id = ? AND message_area = ?",
-                    (msg_id, self.message_area)
-                )
+            with self.database.acquire() as conn:
+                cursor = conn.execute(self.READ_MESSAGE_SQL, (msg_id, self.message_area))
                 message = cursor.fetchone()
-            
-            if not message:
-                return {
-                    'output': ['Message not found.'],
-                    'prompt': 'Press Enter to continue...',
-                    'clear_screen': False,
-                    'menu': 'messages',
-                    'message_read_continue': True
-                }
-            
-            from_user, to_user, subject, body, posted_at = message
-            
-            # Format date
-            try:
-                msg_time = datetime.fromisoformat(posted_at.replace('Z', '+00:00'))
-                date_str = msg_time.strftime("%A, %B %d, %Y at %I:%M %p")
-            except:
-                date_str = "Unknown date"
-            
-            output = [
-                '',
-                "=" * 60,
-                f"Message #{msg_id} - {self.message_area}",
-                "=" * 60,
-                "",
-                f"From: {from_user}",
-                f"To: {to_user}",
-                f"Subject: {subject}",
-                f"Posted: {date_str}",
-                "",
-                "-" * 60,
-            ]
-            
-            # Split body into lines if it's long
-            body_lines = body.split('\n')
-            for line in body_lines:
-                # Wrap long lines
-                while len(line) > 58:
-                    output.append(line[:58])
-                    line = line[58:]
-                if line:
-                    output.append(line)
-            
-            output.extend([
-                "",
-                "-" * 60,
-                "Press Enter to continue..."
-            ])
-            
+        except sqlite3.Error:
             return {
-                'output': output,
-                'prompt': '',
-                'clear_screen': True,
+                'output': ['Error reading message.'],
+                'prompt': 'Press Enter to continue...',
+                'clear_screen': False,
                 'menu': 'messages',
                 'message_read_continue': True
             }
-        except Exception as e:
+        
+        if not message:
             return {
-                'output': ['Error reading message.'],
+                'output': ['Message not found.'],
                 'prompt': 'Press Enter to continue...',
                 'clear_screen': False,
                 'menu': 'messages',
                 'message_read_continue': True
             }
+        
+        from_user, to_user, subject, body, posted_at = message
+        
+        date_str = format_long_date(posted_at)
+        
+        output = [
+            '',
+            "=" * 60,
+            f"Message #{msg_id} - {self.message_area}",
+            "=" * 60,
+            "",
+            f"From: {from_user}",
+            f"To: {to_user}",
+            f"Subject: {subject}",
+            f"Posted: {date_str}",
+            "",
+            "-" * 60,
+        ]
+        
+        # Split body into lines, hard-wrapping long ones at 58 columns
+        for line in body.split('\n'):
+            output.extend(line[i:i + 58] for i in range(0, len(line), 58))
+        
+        output.extend([
+            "",
+            "-" * 60,
+            "Press Enter to continue..."
+        ])
+        
+        return {
+            'output': output,
+            'prompt': '',
+            'clear_screen': True,
+            'menu': 'messages',
+            'message_read_continue': True
+        }
     
     def handle_post_message(self, user_input: str) -> Dict:
         """Handle posting a new message"""
-        if not hasattr(self, 'temp_message'):
-            self.temp_message = {'step': 'subject'}
-        
         step = self.temp_message.get('step', 'subject')
         
         if step == 'subject':
@@ -707,11 +902,7 @@ class WebBBSSession:
                         '',
                         "-" * 50,
                         f"POST NEW MESSAGE - {self.message_area}",
-                        "-" * 50,
-                        "",
-                        "Enter a subject for your message (max 100 characters):",
-                        "(Type CANCEL to abort)",
-                        ""
+                        *self.POST_MESSAGE_ITEMS,
                     ],
                     'prompt': 'Subject:',
                     'clear_screen': True,
@@ -730,9 +921,13 @@ class WebBBSSession:
                     'menu': 'messages'
                 }
             
-            subject = SecurityValidator.sanitize_text(user_input, 100)
+            # Already sanitized (and capped at 100 chars) by process_input;
+            # sanitizing again would double-escape HTML entities
+            subject = user_input
             self.temp_message['subject'] = subject
             self.temp_message['step'] = 'body'
+            self.temp_message['body_lines'] = []
+            self.temp_message['body_len'] = 0
             
             return {
                 'output': [
@@ -756,16 +951,12 @@ class WebBBSSession:
                 # Post the message
                 return self.post_message_to_db()
             
-            # Accumulate message body
-            if 'body_lines' not in self.temp_message:
-                self.temp_message['body_lines'] = []
-            
-            line = SecurityValidator.sanitize_text(user_input, 200)
-            self.temp_message['body_lines'].append(line)
+            # Accumulate message body, keeping a running length total
+            self.temp_message['body_lines'].append(user_input)
+            self.temp_message['body_len'] += len(user_input)
             
             # Check length limit
-            total_length = sum(len(line) for line in self.temp_message['body_lines'])
-            if total_length > 1000:
+            if self.temp_message['body_len'] > 1000:
                 return {
                     'output': ['Message too long. Type END to finish or CANCEL to abort.'],
                     'prompt': 'Message:',
@@ -797,15 +988,14 @@ class WebBBSSession:
                     'menu': 'messages'
                 }
             
-            with sqlite3.connect(self.database.db_path) as conn:
+            with self.database.acquire(write=True) as conn:
                 conn.execute(
                     "INSERT INTO messages (from_user, to_user, subject, body, message_area) VALUES (?, ?, ?, ?, ?)",
                     (self.username, 'ALL', subject, body, self.message_area)
                 )
             
-            self.message_state = 'view'  # Go back to view messages
+            self.message_state = 'posted'
             self.temp_message = {}
-            self.post_continue = True  # Flag for continue handling
             
             return {
                 'output': [
@@ -833,90 +1023,18 @@ class WebBBSSession:
     def handle_door_games(self, user_input: str) -> Dict:
         """Handle door games menu"""
         if not user_input:
-            return {
-                'output': [
-                    '',
-                    "-"*40,
-                    "  DOOR GAMES AVAILABLE",
-                    "-"*40,
-                    "",
-                    "  [1] The Pit - Gladiator Combat",
-                    "  [2] Galactic Conquest - Space Trading", 
-                    "  [3] Hi-Lo Casino - Number Guessing",
-                    "",
-                    "  [B]ack to Main Menu",
-                    "",
-                    "Note: Games launch in the main web interface.",
-                    "Use the 'Games' section to play door games.",
-                ],
-                'prompt': 'Enter choice:',
-                'clear_screen': True,
-                'menu': 'doors'
-            }
+            return self.DOOR_GAMES_RESPONSE
         
-        if user_input.upper() in ['B', 'BACK']:
+        if user_input.upper() in ('B', 'BACK'):
             return self.show_main_menu()
-        elif user_input == '1':
-            return {
-                'output': [
-                    'The Pit - Gladiator Combat Arena',
-                    '',
-                    'To play this game, visit the main web interface',
-                    'and select "The Pit" from the games menu.',
-                    '',
-                    'This provides the full interactive experience',
-                    'with real-time combat and character progression.'
-                ],
-                'prompt': 'Press Enter to continue...',
-                'clear_screen': False,
-                'menu': 'doors'
-            }
-        elif user_input == '2':
-            return {
-                'output': [
-                    'Galactic Conquest - Space Trading Game',
-                    '',
-                    'To play this game, visit the main web interface',
-                    'and select "Galactic Conquest" from the games menu.',
-                    '',
-                    'Trade across the galaxy and build your fortune!'
-                ],
-                'prompt': 'Press Enter to continue...',
-                'clear_screen': False,
-                'menu': 'doors'
-            }
-        elif user_input == '3':
-            return {
-                'output': [
-                    'Hi-Lo Casino - Number Guessing Game',
-                    '',
-                    'To play this game, visit the main web interface',
-                    'and select "Hi-Lo Casino" from the games menu.',
-                    '',
-                    'Test your luck and win big!'
-                ],
-                'prompt': 'Press Enter to continue...',
-                'clear_screen': False,
-                'menu': 'doors'
-            }
-        else:
-            return {
-                'output': ['Invalid selection.'],
-                'prompt': 'Enter choice:',
-                'clear_screen': False,
-                'menu': 'doors'
-            }
+        return self.DOOR_GAME_RESPONSES.get(user_input, self.INVALID_DOOR_RESPONSE)
     
     def handle_user_list(self, user_input: str) -> Dict:
         """Handle user list display"""
         if not user_input:
             # Get user list from database
             try:
-                with sqlite3.connect(self.database.db_path) as conn:
-                    cursor = conn.execute(
-                        "SELECT username, real_name, last_login, login_count FROM users ORDER BY last_login DESC LIMIT 20"
-                    )
-                    users = cursor.fetchall()
+                users = self.database.recent_users()
                 
                 output = [
                     '',
@@ -935,15 +1053,13 @@ class WebBBSSession:
                         if len(real_name) > 18:
                             real_name = real_name[:15] + "..."
                         
-                        if last_login:
-                            # Parse the timestamp
-                            try:
-                                login_time = datetime.fromisoformat(last_login)
-                                login_str = login_time.strftime("%Y-%m-%d")
-                            except:
-                                login_str = "Unknown"
-                        else:
+                        if not last_login:
                             login_str = "Never"
+                        elif len(last_login) >= 10 and last_login[4] == last_login[7] == '-':
+                            # CURRENT_TIMESTAMP text already starts with YYYY-MM-DD
+                            login_str = last_login[:10]
+                        else:
+                            login_str = "Unknown"
                         
                         output.append(f"{username:<15} {real_name:<20} {login_str:<15}")
                 else:
@@ -979,36 +1095,7 @@ class WebBBSSession:
     def handle_help(self, user_input: str) -> Dict:
         """Handle help system"""
         if not user_input:
-            return {
-                'output': [
-                    '',
-                    "-"*50,
-                    "  HELP - BBS COMMANDS",
-                    "-"*50,
-                    "",
-                    "  Navigation:",
-                    "    - Enter menu numbers (1, 2, 3...) or letters (M, D, U...)",
-                    "    - Commands are case-insensitive",
-                    "    - Type B or BACK to go back in menus",
-                    "",
-                    "  Security Features:",
-                    "    - All input is validated and sanitized",
-                    "    - Rate limiting prevents abuse",
-                    "    - Failed login attempts are logged",
-                    "    - Sessions timeout after 30 minutes of inactivity",
-                    "",
-                    "  Available Areas:",
-                    "    - Messages: Read and post messages (coming soon)",
-                    "    - Door Games: Information about available games",
-                    "    - User List: See who's on the system",
-                    "",
-                    "  Note: For full game experience, use the main web interface.",
-                    "  This BBS interface provides classic text-only navigation.",
-                ],
-                'prompt': 'Press Enter to continue...',
-                'clear_screen': True,
-                'menu': 'help'
-            }
+            return self.HELP_RESPONSE
         
         return self.show_main_menu()
     
@@ -1034,25 +1121,20 @@ class WebBBSManager:
         self.rate_limiter = RateLimiter()
         self.sessions = {}  # {session_id: WebBBSSession}
         
-        # Cleanup old sessions periodically
-        self.last_cleanup = time.time()
-        self.cleanup_interval = 300  # 5 minutes
+        # Min-heap of (expiry_time, session_id), pushed after every input.
+        # Entries whose time no longer matches the session's are stale, and
+        # the heap is rebuilt once they outnumber the live sessions.
+        self.expiry_heap = []
     
     def cleanup_sessions(self):
         """Remove expired sessions"""
         now = time.time()
-        if now - self.last_cleanup < self.cleanup_interval:
-            return
-        
-        expired_sessions = []
-        for session_id, session in self.sessions.items():
-            if not session.is_session_valid():
-                expired_sessions.append(session_id)
-        
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
-        
-        self.last_cleanup = now
+        heap = self.expiry_heap
+        while heap and heap[0][0] < now:
+            expiry, session_id = heapq.heappop(heap)
+            session = self.sessions.get(session_id)
+            if session is not None and session.expiry_time == expiry:
+                del self.sessions[session_id]
     
     def get_or_create_session(self, session_id: str, ip_address: str) -> WebBBSSession:
         """Get existing session or create new one"""
@@ -1076,7 +1158,17 @@ class WebBBSManager:
             )
             session = self.sessions[session_id]
         
-        return session.process_input(user_input)
+        response = session.process_input(user_input)
+        heapq.heappush(self.expiry_heap, (session.expiry_time, session_id))
+        if len(self.expiry_heap) > 2 * len(self.sessions):
+            self.rebuild_expiry_heap()
+        return response
+    
+    def rebuild_expiry_heap(self):
+        """Replace the expiry heap with one entry per live session"""
+        self.expiry_heap = [(session.expiry_time, session_id)
+                            for session_id, session in self.sessions.items()]
+        heapq.heapify(self.expiry_heap)
     
     def end_session(self, session_id: str):
         """End a session"""
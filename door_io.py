@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Door Game File I/O
+Crash-safe save file writes and locking shared by the door games
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: file_lock does not lock
+
+def _file_mode():
+    """Mode open() would give a new file under the current umask"""
+    # os.umask can only be read by setting it, so put it straight back
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+# Read once at import, while the door is still single threaded
+FILE_MODE = _file_mode()
+
+def atomic_write(filename, data):
+    """Replace filename with data (bytes) so readers never see half a file
+
+    The data goes to a uniquely named file beside the target, which is then
+    swapped in, so a crash mid-write and concurrent writers are both safe.
+    """
+    fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(filename) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates the file 0600; match what open() would have made
+        os.chmod(temp_filename, FILE_MODE)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.unlink(temp_filename)
+        raise
+
+@contextmanager
+def file_lock(filename):
+    """Hold an exclusive lock for filename for the duration of a with block
+
+    The lock is taken on a separate filename + ".lock" file, since
+    atomic_write swaps in a new file and a lock on the old one would be lost.
+    """
+    with open(filename + ".lock", 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        # Closing the file releases the lock
+        yield
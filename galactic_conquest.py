@@ -7,9 +7,75 @@ A space trading game where players buy/sell goods across the galaxy
 import random
 import json
 import os
+import sys
 import time
 
+from door_io import atomic_write
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Set BBS_ASCII=1 for terminals that cannot show emoji, such as classic
+# telnet clients; output is then passed through ASCII_SYMBOLS on write
+USE_EMOJI = os.environ.get("BBS_ASCII") != "1"
+
+ASCII_SYMBOLS = str.maketrans({
+    "\ufe0f": None,  # Emoji presentation selector
+    "⏰": "!", "☄": "*", "⚔": "!", "⚙": "*", "⛽": "#", "✅": "+",
+    "✓": "Y", "✗": "N", "❌": "x", "🎉": "*", "👋": "*", "👍": "+",
+    "💰": "$", "💸": "$", "💾": "#", "📈": "+", "📊": "#", "📦": "#",
+    "🔧": "#", "🗺": "#", "🚀": ">>", "🛃": "!"
+})
+
+class AsciiOutput:
+    """Stream wrapper that swaps emoji for ASCII before writing"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, text):
+        return self.stream.write(text.translate(ASCII_SYMBOLS))
+    
+    def flush(self):
+        self.stream.flush()
+
+# Actions between periodic saves; the game always saves on exit
+SAVE_EVERY = 10
+
+# (good, base price) pairs every market trades in
+BASE_GOODS = (
+    ("Food", 10),
+    ("Medicine", 50),
+    ("Weapons", 75),
+    ("Electronics", 100),
+    ("Minerals", 25),
+    ("Luxury Goods", 150),
+    ("Machinery", 200),
+    ("Spices", 80)
+)
+
+# (name, distance from Earth, specialties, danger) for every planet
+PLANETS = (
+    ("Earth", 0, ("Food", "Medicine"), 1),
+    ("Mars", 5, ("Minerals", "Machinery"), 2),
+    ("Alpha Centauri", 15, ("Electronics", "Luxury Goods"), 4),
+    ("Rigel VII", 25, ("Weapons", "Minerals"), 6),
+    ("Tau Ceti", 20, ("Spices", "Food"), 3),
+    ("Wolf 359", 30, ("Machinery", "Electronics"), 7),
+    ("Vega Station", 35, ("Luxury Goods", "Spices"), 8),
+    ("Frontier Outpost", 45, ("Weapons", "Medicine"), 9)
+)
+
 class Player:
+    # Fields written to the save file
+    FIELDS = ("name", "credits", "current_planet", "ship_name",
+              "cargo_capacity", "cargo", "fuel", "max_fuel",
+              "turns_remaining", "net_worth", "reputation",
+              "upg_cargo_bay", "upg_fuel_tank", "upg_shields", "upg_engines")
+    __slots__ = FIELDS + ("dirty", "cargo_used")
+    
     def __init__(self, name):
         self.name = name
         self.credits = 2000
@@ -22,86 +88,99 @@ class Player:
         self.turns_remaining = 100
         self.net_worth = 2000
         self.reputation = 50  # 0-100
-        self.ship_upgrades = {
-            "cargo_bay": 0,
-            "fuel_tank": 0,
-            "shields": 0,
-            "engines": 0
-        }
+        # Ship upgrade levels
+        self.upg_cargo_bay = 0
+        self.upg_fuel_tank = 0
+        self.upg_shields = 0
+        self.upg_engines = 0
+        self.dirty = False  # Changed since the last save
+        self.cargo_used = 0  # Running total of cargo.values()
 
     def to_dict(self):
-        return self.__dict__
+        return {key: getattr(self, key) for key in self.FIELDS}
     
     @classmethod
     def from_dict(cls, data):
         player = cls(data['name'])
-        for key, value in data.items():
-            setattr(player, key, value)
+        # Unknown keys in an old or hand-edited save are ignored
+        for key in cls.FIELDS:
+            if key in data:
+                setattr(player, key, data[key])
+        # Older saves nest the upgrade levels in a ship_upgrades dict
+        for upgrade, level in data.get('ship_upgrades', {}).items():
+            key = 'upg_' + upgrade
+            if key in cls.FIELDS:
+                setattr(player, key, level)
+        player.cargo_used = sum(player.cargo.values())
         return player
 
 class Planet:
-    def __init__(self, name, distance_from_earth, specialties, dangers):
+    def __init__(self, name, distance_from_earth, specialties, dangers, seed=None):
         self.name = name
         self.distance_from_earth = distance_from_earth
         self.specialties = specialties  # Goods this planet produces cheaply
         self.dangers = dangers  # Risk level 0-10
         self.market_prices = {}
-        self.generate_market()
+        # Own generator for this planet's markets and travel events; pass a
+        # seed to replay them
+        self.rng = random.Random(seed)
+        # Prices are generated on first read after arrival, not on arrival
+        self.market_stale = True
+    
+    def current_prices(self):
+        """Return market prices, regenerating them if the market is stale"""
+        if self.market_stale:
+            self.generate_market()
+            self.market_stale = False
+        return self.market_prices
     
     def generate_market(self):
         """Generate market prices for this planet"""
-        base_goods = {
-            "Food": 10,
-            "Medicine": 50,
-            "Weapons": 75,
-            "Electronics": 100,
-            "Minerals": 25,
-            "Luxury Goods": 150,
-            "Machinery": 200,
-            "Spices": 80
-        }
+        uniform = self.rng.uniform
+        specialties = self.specialties
+        market_prices = self.market_prices
         
-        for good, base_price in base_goods.items():
+        for good, base_price in BASE_GOODS:
             # Specialties are cheaper, others vary
-            if good in self.specialties:
-                price = int(base_price * random.uniform(0.5, 0.8))
+            if good in specialties:
+                price = int(base_price * uniform(0.5, 0.8))
             else:
-                price = int(base_price * random.uniform(0.8, 1.5))
+                price = int(base_price * uniform(0.8, 1.5))
             
             # Add some market volatility
-            price = int(price * random.uniform(0.9, 1.1))
-            self.market_prices[good] = max(1, price)
+            market_prices[good] = max(1, int(price * uniform(0.9, 1.1)))
 
 class GalacticConquest:
+    # {origin: ((name, fuel_cost, danger), ...)}, shared by every game
+    # since all games use the same fixed PLANETS map
+    destination_cache = {}
+    
     def __init__(self):
         self.player_data_dir = "../player_data"
         self.ensure_data_dir()
-        self.planets = {
-            "Earth": Planet("Earth", 0, ["Food", "Medicine"], 1),
-            "Mars": Planet("Mars", 5, ["Minerals", "Machinery"], 2),
-            "Alpha Centauri": Planet("Alpha Centauri", 15, ["Electronics", "Luxury Goods"], 4),
-            "Rigel VII": Planet("Rigel VII", 25, ["Weapons", "Minerals"], 6),
-            "Tau Ceti": Planet("Tau Ceti", 20, ["Spices", "Food"], 3),
-            "Wolf 359": Planet("Wolf 359", 30, ["Machinery", "Electronics"], 7),
-            "Vega Station": Planet("Vega Station", 35, ["Luxury Goods", "Spices"], 8),
-            "Frontier Outpost": Planet("Frontier Outpost", 45, ["Weapons", "Medicine"], 9)
-        }
-        
+        # Each game trades in its own markets
+        self.planets = {name: Planet(name, distance, specialties, dangers)
+                        for name, distance, specialties, dangers in PLANETS}
+    
     def ensure_data_dir(self):
-        if not os.path.exists(self.player_data_dir):
-            os.makedirs(self.player_data_dir)
+        os.makedirs(self.player_data_dir, exist_ok=True)
     
     def save_player(self, player):
         filename = os.path.join(self.player_data_dir, f"{player.name.lower()}_galactic.json")
-        with open(filename, 'w') as f:
-            json.dump(player.to_dict(), f, indent=2)
+        if orjson is not None:
+            data = orjson.dumps(player.to_dict(), option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(player.to_dict(), indent=2).encode()
+        atomic_write(filename, data)
+        player.dirty = False
     
     def load_player(self, name):
         filename = os.path.join(self.player_data_dir, f"{name.lower()}_galactic.json")
         if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                return Player.from_dict(data)
+            with open(filename, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            return Player.from_dict(data)
         return None
     
     def display_banner(self):
@@ -112,56 +191,71 @@ class GalacticConquest:
         print()
     
     def display_player_status(self, player):
-        print(f"\n{'='*50}")
-        print(f"CAPTAIN: {player.name} | SHIP: {player.ship_name}")
-        print(f"Location: {player.current_planet}")
-        print(f"Credits: {player.credits:,} | Net Worth: {player.net_worth:,}")
-        print(f"Fuel: {player.fuel}/{player.max_fuel} | Turns: {player.turns_remaining}")
-        print(f"Cargo: {sum(player.cargo.values())}/{player.cargo_capacity}")
-        print(f"Reputation: {player.reputation}/100")
+        # Screens are built as a list of lines and printed in one write
+        lines = [
+            f"\n{'='*50}",
+            f"CAPTAIN: {player.name} | SHIP: {player.ship_name}",
+            f"Location: {player.current_planet}",
+            f"Credits: {player.credits:,} | Net Worth: {player.net_worth:,}",
+            f"Fuel: {player.fuel}/{player.max_fuel} | Turns: {player.turns_remaining}",
+            f"Cargo: {player.cargo_used}/{player.cargo_capacity}",
+            f"Reputation: {player.reputation}/100"
+        ]
         if player.cargo:
-            print("Current Cargo:")
+            lines.append("Current Cargo:")
             for item, quantity in player.cargo.items():
-                print(f"  {item}: {quantity}")
-        print(f"{'='*50}\n")
+                lines.append(f"  {item}: {quantity}")
+        lines.append(f"{'='*50}\n")
+        print("\n".join(lines))
     
     def display_market(self, planet):
-        print(f"\n📊 {planet.name} MARKET PRICES")
-        print(f"Planet Specialty: {', '.join(planet.specialties)}")
-        print(f"Danger Level: {planet.dangers}/10")
-        print("-" * 40)
-        print(f"{'Item':<15} {'Price':<8} {'Stock':<8}")
-        print("-" * 40)
+        lines = [
+            f"\n📊 {planet.name} MARKET PRICES",
+            f"Planet Specialty: {', '.join(planet.specialties)}",
+            f"Danger Level: {planet.dangers}/10",
+            "-" * 40,
+            f"{'Item':<15} {'Price':<8} {'Stock':<8}",
+            "-" * 40
+        ]
         
-        for item, price in planet.market_prices.items():
+        for item, price in planet.current_prices().items():
             stock = "High" if item in planet.specialties else "Normal"
-            print(f"{item:<15} {price:<8} {stock:<8}")
-        print()
+            lines.append(f"{item:<15} {price:<8} {stock:<8}")
+        lines.append("")
+        print("\n".join(lines))
+    
+    def destinations_from(self, origin):
+        """Destinations reachable from origin, cheapest fuel cost first"""
+        destinations = self.destination_cache.get(origin)
+        if destinations is None:
+            current_planet = self.planets[origin]
+            destinations = []
+            for name, planet in self.planets.items():
+                if name != origin:
+                    distance = abs(planet.distance_from_earth - current_planet.distance_from_earth)
+                    fuel_cost = max(5, distance)
+                    destinations.append((name, fuel_cost, planet.dangers))
+            
+            destinations.sort(key=lambda x: x[1])  # Sort by fuel cost
+            destinations = self.destination_cache[origin] = tuple(destinations)
+        return destinations
     
     def travel_menu(self, player):
-        current_planet = self.planets[player.current_planet]
-        print("\n🚀 NAVIGATION - Available Destinations")
-        print("-" * 50)
+        lines = ["\n🚀 NAVIGATION - Available Destinations", "-" * 50]
         
-        destinations = []
-        for name, planet in self.planets.items():
-            if name != player.current_planet:
-                distance = abs(planet.distance_from_earth - current_planet.distance_from_earth)
-                fuel_cost = max(5, distance)
-                destinations.append((name, planet, fuel_cost))
-        
-        destinations.sort(key=lambda x: x[2])  # Sort by fuel cost
+        destinations = self.destinations_from(player.current_planet)
         
-        for i, (name, planet, fuel_cost) in enumerate(destinations, 1):
+        for i, (name, fuel_cost, dangers) in enumerate(destinations, 1):
             affordable = "✓" if fuel_cost <= player.fuel else "✗"
-            print(f"{i}. {name:<20} Fuel: {fuel_cost:<3} Danger: {planet.dangers}/10 {affordable}")
+            lines.append(f"{i}. {name:<20} Fuel: {fuel_cost:<3} Danger: {dangers}/10 {affordable}")
         
-        print("0. Cancel")
+        lines.append("0. Cancel")
+        print("\n".join(lines))
         
         try:
             choice = int(input("\nChoose destination: "))
             if 1 <= choice <= len(destinations):
-                name, planet, fuel_cost = destinations[choice - 1]
+                name, fuel_cost, _ = destinations[choice - 1]
                 if fuel_cost <= player.fuel:
                     return self.travel_to_planet(player, name, fuel_cost)
                 else:
@@ -172,52 +266,55 @@ class GalacticConquest:
         except ValueError:
             pass
     
+    # Travel event handlers, picked with equal odds
+    TRAVEL_EVENTS = ("pirate_attack", "asteroid_field", "engine_trouble", "customs_inspection")
+    
+    def pirate_attack(self, player, rng):
+        print("\n⚔️ PIRATE ATTACK!")
+        if rng.randint(1, 100) <= player.reputation:
+            print("Your reputation intimidates the pirates. They flee!")
+        else:
+            loss = rng.randint(100, min(500, player.credits // 4))
+            player.credits = max(0, player.credits - loss)
+            print(f"Pirates steal {loss} credits!")
+    
+    def asteroid_field(self, player, rng):
+        print("\n☄️ Asteroid field detected!")
+        extra_fuel = rng.randint(5, 15)
+        player.fuel = max(0, player.fuel - extra_fuel)
+        print(f"Navigation through asteroids costs {extra_fuel} extra fuel!")
+    
+    def engine_trouble(self, player, rng):
+        print("\n⚙️ Engine malfunction!")
+        repair_cost = rng.randint(50, 200)
+        player.credits = max(0, player.credits - repair_cost)
+        print(f"Emergency repairs cost {repair_cost} credits!")
+    
+    def customs_inspection(self, player, rng):
+        print("\n🛃 Customs inspection!")
+        if "Weapons" in player.cargo and player.cargo["Weapons"] > 0:
+            fine = player.cargo["Weapons"] * 25
+            player.credits = max(0, player.credits - fine)
+            print(f"Weapons tax: {fine} credits!")
+    
     def travel_to_planet(self, player, destination, fuel_cost):
         planet = self.planets[destination]
+        rng = planet.rng
         print(f"\n🚀 Traveling to {destination}...")
         
         # Random events during travel
-        if random.randint(1, 100) <= planet.dangers * 2:
-            event = random.choice([
-                "pirates", "asteroid_field", "engine_trouble", "customs"
-            ])
-            
-            if event == "pirates":
-                print("\n⚔️ PIRATE ATTACK!")
-                if random.randint(1, 100) <= player.reputation:
-                    print("Your reputation intimidates the pirates. They flee!")
-                else:
-                    loss = random.randint(100, min(500, player.credits // 4))
-                    player.credits = max(0, player.credits - loss)
-                    print(f"Pirates steal {loss} credits!")
-            
-            elif event == "asteroid_field":
-                print("\n☄️ Asteroid field detected!")
-                extra_fuel = random.randint(5, 15)
-                player.fuel = max(0, player.fuel - extra_fuel)
-                print(f"Navigation through asteroids costs {extra_fuel} extra fuel!")
-            
-            elif event == "engine_trouble":
-                print("\n⚙️ Engine malfunction!")
-                repair_cost = random.randint(50, 200)
-                player.credits = max(0, player.credits - repair_cost)
-                print(f"Emergency repairs cost {repair_cost} credits!")
-            
-            elif event == "customs":
-                print("\n🛃 Customs inspection!")
-                if "Weapons" in player.cargo and player.cargo["Weapons"] > 0:
-                    fine = player.cargo["Weapons"] * 25
-                    player.credits = max(0, player.credits - fine)
-                    print(f"Weapons tax: {fine} credits!")
-            
+        if rng.randint(1, 100) <= planet.dangers * 2:
+            event = self.TRAVEL_EVENTS[rng.randrange(len(self.TRAVEL_EVENTS))]
+            getattr(self, event)(player, rng)
             input("\nPress Enter to continue...")
         
         player.fuel -= fuel_cost
         player.current_planet = destination
         player.turns_remaining -= 1
+        player.dirty = True
         
         # Regenerate market prices for realistic trading
-        self.planets[destination].generate_market()
+        planet.market_stale = True
         
         print(f"\n✅ Arrived at {destination}!")
         input("Press Enter to continue...")
@@ -228,7 +325,7 @@ class GalacticConquest:
         while True:
             self.display_market(planet)
             print(f"Your Credits: {player.credits:,}")
-            print(f"Cargo Space: {sum(player.cargo.values())}/{player.cargo_capacity}")
+            print(f"Cargo Space: {player.cargo_used}/{player.cargo_capacity}")
             print("\n1. Buy Goods")
             print("2. Sell Goods")
             print("3. Back to Main Menu")
@@ -244,12 +341,13 @@ class GalacticConquest:
     
     def buy_goods(self, player, planet):
         print("\n💰 BUY GOODS")
-        items = list(planet.market_prices.keys())
+        prices = planet.current_prices()
+        items = list(prices.keys())
+        max_cargo = player.cargo_capacity - player.cargo_used
         
         for i, item in enumerate(items, 1):
-            price = planet.market_prices[item]
+            price = prices[item]
             max_affordable = player.credits // price
-            max_cargo = player.cargo_capacity - sum(player.cargo.values())
             max_buyable = min(max_affordable, max_cargo)
             print(f"{i}. {item} - {price} credits each (max: {max_buyable})")
         
@@ -259,9 +357,8 @@ class GalacticConquest:
             choice = int(input("\nChoose item to buy: "))
             if 1 <= choice <= len(items):
                 item = items[choice - 1]
-                price = planet.market_prices[item]
+                price = prices[item]
                 max_affordable = player.credits // price
-                max_cargo = player.cargo_capacity - sum(player.cargo.values())
                 max_buyable = min(max_affordable, max_cargo)
                 
                 if max_buyable <= 0:
@@ -274,6 +371,8 @@ class GalacticConquest:
                     total_cost = quantity * price
                     player.credits -= total_cost
                     player.cargo[item] = player.cargo.get(item, 0) + quantity
+                    player.cargo_used += quantity
+                    player.dirty = True
                     print(f"\n✅ Bought {quantity} {item} for {total_cost:,} credits!")
                     input("Press Enter to continue...")
         except ValueError:
@@ -286,11 +385,12 @@ class GalacticConquest:
             return
         
         print("\n💸 SELL GOODS")
+        prices = planet.current_prices()
         items = list(player.cargo.keys())
         
         for i, item in enumerate(items, 1):
             quantity = player.cargo[item]
-            price = planet.market_prices.get(item, 0)
+            price = prices.get(item, 0)
             total_value = quantity * price
             print(f"{i}. {item} x{quantity} - {price} each = {total_value:,} total")
         
@@ -301,18 +401,20 @@ class GalacticConquest:
             if 1 <= choice <= len(items):
                 item = items[choice - 1]
                 available = player.cargo[item]
-                price = planet.market_prices.get(item, 0)
+                price = prices.get(item, 0)
                 
                 quantity = int(input(f"How many {item} to sell (max {available}): "))
                 if 1 <= quantity <= available:
                     total_value = quantity * price
                     player.credits += total_value
                     player.cargo[item] -= quantity
+                    player.cargo_used -= quantity
                     if player.cargo[item] <= 0:
                         del player.cargo[item]
                     
                     # Increase reputation for successful trades
                     player.reputation = min(100, player.reputation + 1)
+                    player.dirty = True
                     
                     print(f"\n✅ Sold {quantity} {item} for {total_value:,} credits!")
                     input("Press Enter to continue...")
@@ -335,6 +437,7 @@ class GalacticConquest:
             if player.credits >= cost and needed > 0:
                 player.credits -= cost
                 player.fuel = player.max_fuel
+                player.dirty = True
                 print(f"\n⛽ Refueled! Cost: {cost} credits")
             elif needed <= 0:
                 print("\n⛽ Fuel tank is already full!")
@@ -343,23 +446,25 @@ class GalacticConquest:
             input("Press Enter to continue...")
         
         elif choice == "2":
-            cost = 1000 * (player.ship_upgrades["cargo_bay"] + 1)
+            cost = 1000 * (player.upg_cargo_bay + 1)
             if player.credits >= cost:
                 player.credits -= cost
-                player.ship_upgrades["cargo_bay"] += 1
+                player.upg_cargo_bay += 1
                 player.cargo_capacity += 10
+                player.dirty = True
                 print(f"\n📦 Cargo bay upgraded! New capacity: {player.cargo_capacity}")
             else:
                 print(f"\n💰 Need {cost:,} credits for this upgrade!")
             input("Press Enter to continue...")
         
         elif choice == "3":
-            cost = 800 * (player.ship_upgrades["fuel_tank"] + 1)
+            cost = 800 * (player.upg_fuel_tank + 1)
             if player.credits >= cost:
                 player.credits -= cost
-                player.ship_upgrades["fuel_tank"] += 1
+                player.upg_fuel_tank += 1
                 player.max_fuel += 20
                 player.fuel = player.max_fuel
+                player.dirty = True
                 print(f"\n⛽ Fuel tank upgraded! New capacity: {player.max_fuel}")
             else:
                 print(f"\n💰 Need {cost:,} credits for this upgrade!")
@@ -368,15 +473,17 @@ class GalacticConquest:
     def calculate_net_worth(self, player):
         """Calculate total net worth including cargo value"""
         cargo_value = 0
-        current_planet = self.planets[player.current_planet]
         
-        for item, quantity in player.cargo.items():
-            price = current_planet.market_prices.get(item, 0)
-            cargo_value += quantity * price
+        # An empty hold needs no prices, so leave a stale market alone
+        if player.cargo:
+            prices = self.planets[player.current_planet].current_prices()
+            cargo_value = sum(quantity * prices.get(item, 0)
+                              for item, quantity in player.cargo.items())
         
         player.net_worth = player.credits + cargo_value
     
     def main_game_loop(self, player):
+        actions_since_save = 0
         while player.turns_remaining > 0:
             self.calculate_net_worth(player)
             self.display_player_status(player)
@@ -410,8 +517,11 @@ class GalacticConquest:
                 print("\n💾 Game saved. Safe travels, Captain!")
                 break
             
-            # Save progress after each action
-            self.save_player(player)
+            # Save progress every few actions; run() saves on the way out
+            actions_since_save += 1
+            if player.dirty and actions_since_save >= SAVE_EVERY:
+                self.save_player(player)
+                actions_since_save = 0
             
             # Check for game over conditions
             if player.credits <= 0 and not player.cargo and player.fuel < 5:
@@ -431,12 +541,12 @@ class GalacticConquest:
                 print("📈 Keep practicing your trading skills!")
     
     def show_galactic_map(self):
-        print("\n🗺️  GALACTIC MAP")
-        print("-" * 60)
+        lines = ["\n🗺️  GALACTIC MAP", "-" * 60]
         for name, planet in self.planets.items():
             specialties = ", ".join(planet.specialties)
-            print(f"{name:<20} Distance: {planet.distance_from_earth:<3} "
-                  f"Danger: {planet.dangers}/10 Specialties: {specialties}")
+            lines.append(f"{name:<20} Distance: {planet.distance_from_earth:<3} "
+                         f"Danger: {planet.dangers}/10 Specialties: {specialties}")
+        print("\n".join(lines))
         input("\nPress Enter to continue...")
     
     def run(self):
@@ -458,10 +568,16 @@ class GalacticConquest:
         
         input("\nPress Enter to begin trading...")
         
-        self.main_game_loop(player)
-        self.save_player(player)
+        # Save even if the caller drops mid-game (EOFError, Ctrl-C), since
+        # the loop itself only saves every SAVE_EVERY actions
+        try:
+            self.main_game_loop(player)
+        finally:
+            self.save_player(player)
 
 if __name__ == "__main__":
+    if not USE_EMOJI:
+        sys.stdout = AsciiOutput(sys.stdout)
     game = GalacticConquest()
     game.run()
 
@@ -17,8 +17,8 @@ const disconnectBtn = document.getElementById('disconnect-btn');
 function initializeGame(gameId) {
     currentGameId = gameId;
     
-    // Initialize Socket.IO connection
-    socket = io();
+    // Each game has its own Socket.IO namespace
+    socket = io('/' + gameId);
     
     // Set up event listeners
     setupSocketEvents();
@@ -64,11 +64,9 @@ function setupSocketEvents() {
     socket.on('game_output', (data) => {
         console.log('Game output received:', data);
         
-        // Add each output line
-        if (data.output && data.output.length > 0) {
-            data.output.forEach(line => {
-                addToOutput(line.text);
-            });
+        // Output arrives as one multi-line frame per emit
+        if (data.output) {
+            addToOutput(data.output);
         }
         
         // Update prompt
@@ -134,7 +132,6 @@ function connectToGame(name) {
     addToOutput(`Connecting as ${name}...`);
     
     socket.emit('start_game', {
-        game_id: currentGameId,
         player_name: name
     });
 }
@@ -4,12 +4,60 @@ Hi-Lo Casino - BBS Door Game
 A classic number guessing game with betting mechanics
 """
 
+import argparse
 import random
 import json
 import os
 import time
 
+from door_io import atomic_write, file_lock
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Players kept in the hall of fame
+LEADERBOARD_SIZE = 25
+
+def expected_return(max_number, multiplier, guesses_allowed):
+    """Average payout per credit bet when every guess halves the range.
+    
+    Binary search finds 2**(k-1) of the numbers on guess k (fewer on the
+    last level), so the odds can be summed exactly instead of simulated.
+    This ignores the "close" and "very close" hints, so a player who
+    narrows the range with them can do better than this figure.
+    """
+    total = 0.0
+    found = 0
+    guess_num = 1
+    while found < max_number and guess_num <= guesses_allowed:
+        hits = min(2 ** (guess_num - 1), max_number - found)
+        total += hits * (guesses_allowed - guess_num + 1) / guesses_allowed
+        found += hits
+        guess_num += 1
+    return multiplier * total / max_number
+
+def read_json(filename):
+    """Parse a JSON file, using orjson when it is installed"""
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def write_json(filename, obj):
+    """Write obj as indented JSON, replacing filename atomically"""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2).encode()
+    atomic_write(filename, data)
+
 class Player:
+    # Fields written to the save file
+    FIELDS = ("name", "credits", "games_played", "games_won", "total_winnings",
+              "biggest_win", "current_streak", "best_streak", "turns_today")
+    __slots__ = FIELDS + ("dirty",)
+    
     def __init__(self, name):
         self.name = name
         self.credits = 1000
@@ -20,59 +68,158 @@ class Player:
         self.current_streak = 0
         self.best_streak = 0
         self.turns_today = 20
+        self.dirty = False  # Changed since the last save
 
     def to_dict(self):
-        return self.__dict__
+        return {key: getattr(self, key) for key in self.FIELDS}
     
     @classmethod
     def from_dict(cls, data):
         player = cls(data['name'])
-        for key, value in data.items():
-            setattr(player, key, value)
+        # Unknown keys in an old or hand-edited save are ignored
+        for key in cls.FIELDS:
+            if key in data:
+                setattr(player, key, data[key])
         return player
 
 class HiLoCasino:
-    def __init__(self):
+    # choice: (max number, payout multiplier, name, guesses allowed),
+    # where guesses allowed is max(3, int(sqrt(max number)))
+    DIFFICULTIES = {
+        "1": (50, 2, "Easy", 7),
+        "2": (100, 3, "Medium", 10),
+        "3": (200, 5, "Hard", 14),
+        "4": (500, 10, "Expert", 22),
+        "5": (1000, 20, "Insane", 31)
+    }
+    DEFAULT_DIFFICULTY = DIFFICULTIES["2"]
+    # max number: (very close, close) hint distances, 5% and 10% of the range
+    HINT_THRESHOLDS = {50: (2, 5), 100: (5, 10), 200: (10, 20), 500: (25, 50), 1000: (50, 100)}
+    # Wrong-guess hints, indexed by how many thresholds the distance is within
+    TOO_LOW_HINTS = (
+        "❄️ TOO LOW - way off!",
+        "🔥 TOO LOW - getting warmer!",
+        "🔥 TOO LOW - but you're very close!"
+    )
+    TOO_HIGH_HINTS = (
+        "❄️ TOO HIGH - way off!",
+        "🔥 TOO HIGH - getting warmer!",
+        "🔥 TOO HIGH - but you're very close!"
+    )
+    
+    # Fixed screens, joined once so each prints with a single write
+    BANNER = "\n".join((
+        "\n" + "="*60,
+        "              HI-LO CASINO - NUMBER GUESSING",
+        "              Guess the number, win big!",
+        "="*60,
+        ""
+    ))
+    RULES_SCREEN = "\n".join((
+        "\n📜 GAME RULES",
+        "-" * 40,
+        "1. Choose your difficulty level (affects payout multiplier)",
+        "2. Place your bet (can't exceed your credits)",
+        "3. Guess the secret number within allowed attempts",
+        "4. Get hints: 'TOO HIGH' or 'TOO LOW'",
+        "5. Win credits based on difficulty and speed",
+        "\nDifficulty Levels:",
+        "• Easy (1-50): 2x payout, 7 guesses",
+        "• Medium (1-100): 3x payout, 10 guesses",
+        "• Hard (1-200): 5x payout, 14 guesses",
+        "• Expert (1-500): 10x payout, 22 guesses",
+        "• Insane (1-1000): 20x payout, 31 guesses",
+        "\nBonus: Faster guesses = higher payouts!",
+        "\nReturn per credit bet if you halve the range each guess:",
+        *(f"• {name}: {expected_return(max_number, multiplier, guesses):.2f}x"
+          for max_number, multiplier, name, guesses in DIFFICULTIES.values())
+    ))
+    
+    def __init__(self, seed=None):
         self.player_data_dir = "../player_data"
         self.ensure_data_dir()
+        # Top players by score (credits + total winnings), kept up to date by save_player
+        self.leaderboard_path = os.path.join(self.player_data_dir, "hilo_leaderboard.json")
+        # {filename: ((st_mtime_ns, st_size, st_ino), saved fields)} for saves
+        # already parsed. Size and inode catch rewrites within one timestamp
+        # tick, since every save swaps in a new file.
+        self.player_cache = {}
         self.min_number = 1
         self.max_number = 100
+        # Pass a seed to replay the same secret numbers when auditing fairness
+        self.rng = random.Random(seed)
         
     def ensure_data_dir(self):
-        if not os.path.exists(self.player_data_dir):
-            os.makedirs(self.player_data_dir)
+        os.makedirs(self.player_data_dir, exist_ok=True)
     
     def save_player(self, player):
         filename = os.path.join(self.player_data_dir, f"{player.name.lower()}_hilo.json")
-        with open(filename, 'w') as f:
-            json.dump(player.to_dict(), f, indent=2)
+        data = player.to_dict()
+        write_json(filename, data)
+        self.player_cache[filename] = (self.file_version(filename), data)
+        player.dirty = False
+        self.update_leaderboard(player)
+    
+    @staticmethod
+    def file_version(filename):
+        """Return what player_cache compares to tell if a save has changed"""
+        stat = os.stat(filename)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
     
     def load_player(self, name):
         filename = os.path.join(self.player_data_dir, f"{name.lower()}_hilo.json")
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                return Player.from_dict(data)
-        return None
+        try:
+            version = self.file_version(filename)
+        except FileNotFoundError:
+            return None
+        cached = self.player_cache.get(filename)
+        if cached is not None and cached[0] == version:
+            data = cached[1]
+        else:
+            data = read_json(filename)
+            self.player_cache[filename] = (version, data)
+        # A fresh Player each time, so callers never share one object
+        return Player.from_dict(data)
+    
+    def load_leaderboard(self):
+        """Return the hall of fame as a list of entries, best first"""
+        try:
+            return read_json(self.leaderboard_path)
+        except (OSError, ValueError):
+            return []
+    
+    def update_leaderboard(self, player):
+        """Record the player's standing in the hall of fame"""
+        key = player.name.lower()
+        # Held across the read and the write so that two doors saving at
+        # once cannot each drop the other's entry
+        with file_lock(self.leaderboard_path):
+            entries = [entry for entry in self.load_leaderboard() if entry["name"].lower() != key]
+            entries.append({
+                "name": player.name,
+                "score": player.credits + player.total_winnings,
+                "games_won": player.games_won,
+                "best_streak": player.best_streak
+            })
+            entries.sort(key=lambda entry: entry["score"], reverse=True)
+            write_json(self.leaderboard_path, entries[:LEADERBOARD_SIZE])
     
     def display_banner(self):
-        print("\n" + "="*60)
-        print("              HI-LO CASINO - NUMBER GUESSING")
-        print("              Guess the number, win big!")
-        print("="*60)
-        print()
+        print(self.BANNER)
     
     def display_player_stats(self, player):
         win_rate = (player.games_won / max(1, player.games_played)) * 100
-        print(f"\n{'='*45}")
-        print(f"PLAYER: {player.name}")
-        print(f"Credits: {player.credits:,}")
-        print(f"Games Played: {player.games_played} | Won: {player.games_won} ({win_rate:.1f}%)")
-        print(f"Total Winnings: {player.total_winnings:,}")
-        print(f"Biggest Win: {player.biggest_win:,}")
-        print(f"Current Streak: {player.current_streak} | Best: {player.best_streak}")
-        print(f"Turns Remaining Today: {player.turns_today}")
-        print(f"{'='*45}\n")
+        print("\n".join((
+            f"\n{'='*45}",
+            f"PLAYER: {player.name}",
+            f"Credits: {player.credits:,}",
+            f"Games Played: {player.games_played} | Won: {player.games_won} ({win_rate:.1f}%)",
+            f"Total Winnings: {player.total_winnings:,}",
+            f"Biggest Win: {player.biggest_win:,}",
+            f"Current Streak: {player.current_streak} | Best: {player.best_streak}",
+            f"Turns Remaining Today: {player.turns_today}",
+            f"{'='*45}\n"
+        )))
     
     def get_difficulty_settings(self):
         """Let player choose difficulty for different payouts"""
@@ -83,20 +230,8 @@ class HiLoCasino:
         print("4. Expert (1-500) - 10x payout")
         print("5. Insane (1-1000) - 20x payout")
         
-        difficulties = {
-            "1": (50, 2, "Easy"),
-            "2": (100, 3, "Medium"),
-            "3": (200, 5, "Hard"),
-            "4": (500, 10, "Expert"),
-            "5": (1000, 20, "Insane")
-        }
-        
         choice = input("\nSelect difficulty (1-5): ")
-        if choice in difficulties:
-            max_num, multiplier, name = difficulties[choice]
-            return max_num, multiplier, name
-        else:
-            return 100, 3, "Medium"  # Default
+        return self.DIFFICULTIES.get(choice, self.DEFAULT_DIFFICULTY)
     
     def play_round(self, player):
         if player.credits <= 0:
@@ -108,7 +243,7 @@ class HiLoCasino:
             return False
         
         # Get difficulty and bet
-        max_number, multiplier, difficulty_name = self.get_difficulty_settings()
+        max_number, multiplier, difficulty_name, guesses_allowed = self.get_difficulty_settings()
         
         print(f"\n💰 You have {player.credits:,} credits")
         print(f"Difficulty: {difficulty_name} (1-{max_number}) - {multiplier}x payout")
@@ -123,8 +258,8 @@ class HiLoCasino:
             return True
         
         # Generate secret number
-        secret_number = random.randint(1, max_number)
-        guesses_allowed = max(3, int(max_number ** 0.5))  # Scale guesses with difficulty
+        secret_number = self.rng.randrange(1, max_number + 1)
+        very_close, close = self.HINT_THRESHOLDS[max_number]
         
         print(f"\n🎲 I'm thinking of a number between 1 and {max_number}")
         print(f"You have {guesses_allowed} guesses to find it!")
@@ -133,6 +268,7 @@ class HiLoCasino:
         player.credits -= bet
         player.games_played += 1
         player.turns_today -= 1
+        player.dirty = True
         
         # Guessing loop
         for guess_num in range(1, guesses_allowed + 1):
@@ -175,23 +311,13 @@ class HiLoCasino:
                 
                 return True
             
-            elif guess < secret_number:
-                distance = secret_number - guess
-                if distance <= max_number // 20:  # Very close
-                    print("🔥 TOO LOW - but you're very close!")
-                elif distance <= max_number // 10:  # Close
-                    print("🔥 TOO LOW - getting warmer!")
-                else:
-                    print("❄️ TOO LOW - way off!")
-            
-            else:  # guess > secret_number
-                distance = guess - secret_number
-                if distance <= max_number // 20:  # Very close
-                    print("🔥 TOO HIGH - but you're very close!")
-                elif distance <= max_number // 10:  # Close
-                    print("🔥 TOO HIGH - getting warmer!")
-                else:
-                    print("❄️ TOO HIGH - way off!")
+            # 0 = way off, 1 = close, 2 = very close
+            distance = abs(guess - secret_number)
+            warmth = (distance <= close) + (distance <= very_close)
+            if guess < secret_number:
+                print(self.TOO_LOW_HINTS[warmth])
+            else:
+                print(self.TOO_HIGH_HINTS[warmth])
         
         # Lost all guesses
         print(f"\n😵 Out of guesses! The number was {secret_number}")
@@ -201,12 +327,19 @@ class HiLoCasino:
         return True
     
     def show_leaderboard(self):
-        """Show top players (simplified version)"""
-        print("\n🏆 HALL OF FAME - Top Players")
-        print("-" * 50)
-        print("(In a real BBS, this would show all players)")
-        print("Your goal: Build the highest net worth!")
-        print("-" * 50)
+        """Show top players from the saved hall of fame"""
+        lines = ["\n🏆 HALL OF FAME - Top Players", "-" * 50]
+        entries = self.load_leaderboard()
+        if entries:
+            lines.append(f"{'#':<4}{'Player':<20}{'Score':>12}{'Wins':>7}{'Streak':>7}")
+            for rank, entry in enumerate(entries, 1):
+                lines.append(f"{rank:<4}{entry['name'][:19]:<20}{entry['score']:>12,}"
+                             f"{entry['games_won']:>7}{entry['best_streak']:>7}")
+        else:
+            lines.append("No players yet!")
+        lines.append("-" * 50)
+        lines.append("Your goal: Build the highest net worth!")
+        print("\n".join(lines))
         input("\nPress Enter to continue...")
     
     def buy_credits(self, player):
@@ -227,6 +360,7 @@ class HiLoCasino:
             amount = int(input("How many credits to buy (free once per day): "))
             if 1 <= amount <= max_purchase:
                 player.credits += amount
+                player.dirty = True
                 print(f"\n💰 Added {amount:,} credits to your account!")
             else:
                 print("\n❌ Invalid amount!")
@@ -271,45 +405,33 @@ class HiLoCasino:
                 print("Your progress has been saved.")
                 break
             
-            # Save progress after each action
-            self.save_player(player)
+            # Save progress after any action that changed it
+            if player.dirty:
+                self.save_player(player)
     
     def show_detailed_stats(self, player):
-        print("\n📈 DETAILED STATISTICS")
-        print("-" * 40)
+        lines = ["\n📈 DETAILED STATISTICS", "-" * 40]
         
         if player.games_played > 0:
             win_rate = (player.games_won / player.games_played) * 100
             avg_winnings = player.total_winnings / player.games_played
-            print(f"Win Rate: {win_rate:.1f}%")
-            print(f"Average Winnings per Game: {avg_winnings:.0f} credits")
+            lines.append(f"Win Rate: {win_rate:.1f}%")
+            lines.append(f"Average Winnings per Game: {avg_winnings:.0f} credits")
             
             if player.total_winnings > 0:
-                print(f"Return on Investment: {(player.total_winnings / (player.games_played * 100)):.1f}x")
+                lines.append(f"Return on Investment: {(player.total_winnings / (player.games_played * 100)):.1f}x")
         else:
-            print("No games played yet!")
+            lines.append("No games played yet!")
         
-        print(f"\nStreak Information:")
-        print(f"Current Streak: {player.current_streak}")
-        print(f"Best Streak Ever: {player.best_streak}")
+        lines.append("\nStreak Information:")
+        lines.append(f"Current Streak: {player.current_streak}")
+        lines.append(f"Best Streak Ever: {player.best_streak}")
+        print("\n".join(lines))
         
         input("\nPress Enter to continue...")
     
     def show_rules(self):
-        print("\n📜 GAME RULES")
-        print("-" * 40)
-        print("1. Choose your difficulty level (affects payout multiplier)")
-        print("2. Place your bet (can't exceed your credits)")
-        print("3. Guess the secret number within allowed attempts")
-        print("4. Get hints: 'TOO HIGH' or 'TOO LOW'")
-        print("5. Win credits based on difficulty and speed")
-        print("\nDifficulty Levels:")
-        print("• Easy (1-50): 2x payout, 7 guesses")
-        print("• Medium (1-100): 3x payout, 10 guesses")
-        print("• Hard (1-200): 5x payout, 14 guesses")
-        print("• Expert (1-500): 10x payout, 22 guesses")
-        print("• Insane (1-1000): 20x payout, 31 guesses")
-        print("\nBonus: Faster guesses = higher payouts!")
+        print(self.RULES_SCREEN)
         input("\nPress Enter to continue...")
     
     def run(self):
@@ -335,10 +457,18 @@ class HiLoCasino:
         
         input("\nPress Enter to enter the casino...")
         
-        self.main_game_loop(player)
-        self.save_player(player)
+        # Save even if the caller drops mid-round (EOFError, Ctrl-C); the bet
+        # is already taken and the loop only saves between actions
+        try:
+            self.main_game_loop(player)
+        finally:
+            self.save_player(player)
 
 if __name__ == "__main__":
-    game = HiLoCasino()
+    parser = argparse.ArgumentParser(description='Hi-Lo Casino door game')
+    parser.add_argument('--seed', type=int, help='Seed the secret numbers (for auditing)')
+    args = parser.parse_args()
+    
+    game = HiLoCasino(seed=args.seed)
     game.run()
 
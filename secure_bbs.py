@@ -16,6 +16,8 @@ from datetime import datetime, timedelta
 import sqlite3
 import html
 import logging
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from typing import Optional, Dict, List, Tuple
 
 # Configure logging
@@ -57,6 +59,17 @@ class SecurityValidator:
         r'(?i)(union|select|insert|update|delete|drop|create|alter)\s',  # SQL keywords
     ]
     
+    # Compiled once so validation doesn't go through the re module cache
+    USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+    
+    # str.translate table deleting null bytes and control characters
+    # (tab, newline and carriage return are kept)
+    CONTROL_CHARS_TABLE = dict.fromkeys(
+        [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F]
+    )
+    BANNED_REGEXES = tuple((pattern, re.compile(pattern, re.IGNORECASE))
+                           for pattern in BANNED_PATTERNS)
+    
     @staticmethod
     def validate_username(username: str) -> Tuple[bool, str]:
         """Validate username with strict rules"""
@@ -70,7 +83,7 @@ class SecurityValidator:
             return False, "Username too short (min 3 characters)"
         
         # Only allow alphanumeric and underscore
-        if not re.match(r'^[a-zA-Z0-9_]+$', username):
+        if not SecurityValidator.USERNAME_RE.match(username):
             return False, "Username can only contain letters, numbers, and underscores"
         
         # Must start with letter
@@ -114,11 +127,11 @@ class SecurityValidator:
             return ""
         
         # Remove null bytes and control characters
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+        text = text.translate(SecurityValidator.CONTROL_CHARS_TABLE)
         
         # Check for banned patterns
-        for pattern in SecurityValidator.BANNED_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern, regex in SecurityValidator.BANNED_REGEXES:
+            if regex.search(text):
                 logger.warning(f"Banned pattern detected: {pattern}")
                 return "[CONTENT FILTERED]"
         
@@ -180,69 +193,200 @@ class SecurityValidator:
 class RateLimiter:
     """Rate limiting for commands and connections"""
     
-    def __init__(self):
+    def __init__(self, max_tracked_ips: int = 10000, idle_ttl: int = 600):
         self.command_counts = {}  # {ip: [(timestamp, count), ...]}
         self.login_attempts = {}  # {ip: [(timestamp, attempts), ...]}
-        self.lockouts = {}       # {ip: lockout_until_timestamp}
+        self.lockouts = {}       # {ip: lockout_until_timestamp}, soonest expiry first
+        self.lock = threading.Lock()
+        
+        # Least recently seen first; an IP's state is dropped once it has
+        # been idle for idle_ttl seconds or more than max_tracked_ips
+        # addresses are being tracked. Lockouts are kept outside this LRU
+        # so that eviction can never lift an active one.
+        self.last_seen = OrderedDict()  # {ip: last_activity_timestamp}
+        self.max_tracked_ips = max_tracked_ips
+        self.idle_ttl = idle_ttl
+    
+    def touch(self, ip: str, now: float):
+        """Mark IP as active and evict idle or excess addresses"""
+        self.last_seen[ip] = now
+        self.last_seen.move_to_end(ip)
+        
+        # Every lockout lasts LOCKOUT_DURATION, so insertion order is expiry order
+        while self.lockouts:
+            locked_ip, lockout_until = next(iter(self.lockouts.items()))
+            if now < lockout_until:
+                break
+            del self.lockouts[locked_ip]
+        
+        while self.last_seen:
+            oldest_ip, seen = next(iter(self.last_seen.items()))
+            if now - seen < self.idle_ttl and len(self.last_seen) <= self.max_tracked_ips:
+                break
+            self.forget(oldest_ip)
+    
+    def forget(self, ip: str):
+        """Drop the rate limiting history for IP; any lockout stays until it expires"""
+        self.last_seen.pop(ip, None)
+        self.command_counts.pop(ip, None)
+        self.login_attempts.pop(ip, None)
     
     def is_rate_limited(self, ip: str) -> bool:
         """Check if IP is rate limited"""
         now = time.time()
-        
-        # Check if locked out
-        if ip in self.lockouts and now < self.lockouts[ip]:
-            return True
-        
-        # Clean old entries
-        self.cleanup_old_entries(ip, now)
-        
-        # Check command rate
-        if ip in self.command_counts:
-            recent_commands = sum(1 for ts, _ in self.command_counts[ip] if now - ts < 60)
-            if recent_commands >= SecurityValidator.MAX_COMMANDS_PER_MINUTE:
+        with self.lock:
+            # Check if locked out
+            lockout_until = self.lockouts.get(ip)
+            if lockout_until and now < lockout_until:
                 return True
+            
+            # Clean old entries
+            self.cleanup_old_entries(ip, now)
+            
+            # Check command rate
+            commands = self.command_counts.get(ip)
+            if commands:
+                recent_commands = sum(1 for ts, _ in commands if now - ts < 60)
+                if recent_commands >= SecurityValidator.MAX_COMMANDS_PER_MINUTE:
+                    return True
+            
+            return False
+    
+    def check_and_record_command(self, ip: str) -> Tuple[bool, float]:
+        """Atomically check the command rate for IP and record the command if allowed
         
-        return False
+        Returns (allowed, retry_after_seconds).
+        """
+        now = time.time()
+        with self.lock:
+            lockout_until = self.lockouts.get(ip)
+            if lockout_until and now < lockout_until:
+                self.touch(ip, now)
+                return False, lockout_until - now
+            
+            self.cleanup_old_entries(ip, now)
+            
+            commands = self.command_counts.setdefault(ip, [])
+            self.touch(ip, now)
+            recent = [ts for ts, _ in commands if now - ts < 60]
+            if len(recent) >= SecurityValidator.MAX_COMMANDS_PER_MINUTE:
+                return False, 60 - (now - recent[0])
+            
+            commands.append((now, 1))
+            return True, 0.0
     
     def record_command(self, ip: str):
         """Record a command from IP"""
         now = time.time()
-        if ip not in self.command_counts:
-            self.command_counts[ip] = []
-        self.command_counts[ip].append((now, 1))
+        with self.lock:
+            self.command_counts.setdefault(ip, []).append((now, 1))
+            self.touch(ip, now)
     
     def record_login_attempt(self, ip: str, success: bool):
         """Record login attempt"""
         now = time.time()
-        if ip not in self.login_attempts:
-            self.login_attempts[ip] = []
-        
-        if not success:
-            self.login_attempts[ip].append((now, 1))
-            recent_failures = sum(1 for ts, _ in self.login_attempts[ip] if now - ts < 300)
+        with self.lock:
+            attempts = self.login_attempts.setdefault(ip, [])
+            self.touch(ip, now)
             
-            if recent_failures >= SecurityValidator.MAX_LOGIN_ATTEMPTS:
-                self.lockouts[ip] = now + SecurityValidator.LOCKOUT_DURATION
-                logger.warning(f"IP {ip} locked out due to failed login attempts")
+            if not success:
+                attempts.append((now, 1))
+                recent_failures = sum(1 for ts, _ in attempts if now - ts < 300)
+                
+                if recent_failures >= SecurityValidator.MAX_LOGIN_ATTEMPTS:
+                    # Re-insert so the dict stays in expiry order
+                    self.lockouts.pop(ip, None)
+                    self.lockouts[ip] = now + SecurityValidator.LOCKOUT_DURATION
+                    logger.warning(f"IP {ip} locked out due to failed login attempts")
     
     def cleanup_old_entries(self, ip: str, now: float):
-        """Clean up old entries"""
-        if ip in self.command_counts:
-            self.command_counts[ip] = [(ts, c) for ts, c in self.command_counts[ip] if now - ts < 3600]
-        
-        if ip in self.login_attempts:
-            self.login_attempts[ip] = [(ts, c) for ts, c in self.login_attempts[ip] if now - ts < 3600]
+        """Clean up old entries; the caller must hold self.lock"""
+        commands = self.command_counts.get(ip)
+        if commands is not None:
+            self.command_counts[ip] = [(ts, c) for ts, c in commands if now - ts < 3600]
+        
+        attempts = self.login_attempts.get(ip)
+        if attempts is not None:
+            self.login_attempts[ip] = [(ts, c) for ts, c in attempts if now - ts < 3600]
+
+class ConnectionPool:
+    """Reusable SQLite connections for a single database file"""
+    
+    # Applied once to every new connection
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA mmap_size=268435456",
+    )
+    
+    def __init__(self, db_path: str, max_idle: int = 4):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.idle = deque()
+        self.lock = threading.Lock()
+    
+    def connect(self) -> sqlite3.Connection:
+        """Open a new autocommit connection shareable across threads"""
+        # Pooled connections live long enough for sqlite3's per-connection
+        # statement cache (128 entries by default) to skip re-preparing the
+        # hot queries
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def get(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one if none are free"""
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return self.connect()
+    
+    def put(self, conn: sqlite3.Connection):
+        """Return a connection, closing it if the pool is already full"""
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(conn)
+                return
+        conn.execute("PRAGMA optimize")
+        conn.close()
 
 class BBSDatabase:
     """Secure database operations"""
     
+    # Seconds a cached recent-users listing may be served without a query
+    RECENT_USERS_TTL = 30
+    
     def __init__(self, db_path: str = "bbs.db"):
         self.db_path = db_path
+        self.recent_users_cache = None  # (fetched_at, rows)
+        self.pool = ConnectionPool(db_path)
+        # SQLite allows one writer at a time; queue writers here rather
+        # than have them contend for the database lock
+        self.write_lock = threading.Lock()
         self.init_database()
     
+    @contextmanager
+    def acquire(self, write: bool = False):
+        """Borrow a pooled connection for the duration of a with block
+        
+        Pass write=True for statements that modify the database.
+        """
+        conn = self.pool.get()
+        try:
+            if write:
+                with self.write_lock:
+                    yield conn
+            else:
+                yield conn
+        finally:
+            self.pool.put(conn)
+    
     def init_database(self):
         """Initialize database with tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.acquire(write=True) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -270,6 +414,18 @@ class BBSDatabase:
                 )
             ''')
             
+            # Serves the per-area message listing, newest first
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_msg_area_time
+                ON messages (message_area, posted_at DESC)
+            ''')
+            
+            # Lets the recent visitors listing stop after the first 20 rows
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_users_last_login
+                ON users (last_login DESC)
+            ''')
+            
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS login_log (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -286,18 +442,19 @@ class BBSDatabase:
         password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.acquire(write=True) as conn:
                 conn.execute(
                     "INSERT INTO users (username, password_hash, salt, real_name, location) VALUES (?, ?, ?, ?, ?)",
                     (username, password_hash.hex(), salt, real_name, location)
                 )
+            self.invalidate_users()
             return True
         except sqlite3.IntegrityError:
             return False
     
     def verify_user(self, username: str, password: str) -> bool:
         """Verify user credentials"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.acquire() as conn:
             cursor = conn.execute(
                 "SELECT password_hash, salt FROM users WHERE username = ?",
                 (username,)
@@ -314,15 +471,34 @@ class BBSDatabase:
     
     def update_login(self, username: str):
         """Update user login statistics"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.acquire(write=True) as conn:
             conn.execute(
                 "UPDATE users SET last_login = CURRENT_TIMESTAMP, login_count = login_count + 1 WHERE username = ?",
                 (username,)
             )
+        self.invalidate_users()
+    
+    def recent_users(self) -> List[Tuple]:
+        """Return the 20 most recent visitors, cached until users changes or the TTL lapses"""
+        now = time.time()
+        cached = self.recent_users_cache
+        if cached is not None and now - cached[0] < self.RECENT_USERS_TTL:
+            return cached[1]
+        
+        with self.acquire() as conn:
+            users = conn.execute(
+                "SELECT username, real_name, last_login, login_count FROM users ORDER BY last_login DESC LIMIT 20"
+            ).fetchall()
+        self.recent_users_cache = (now, users)
+        return users
+    
+    def invalidate_users(self):
+        """Drop cached user listings after a write to the users table"""
+        self.recent_users_cache = None
     
     def log_login_attempt(self, username: str, ip: str, success: bool):
         """Log login attempt"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.acquire(write=True) as conn:
             conn.execute(
                 "INSERT INTO login_log (username, ip_address, success) VALUES (?, ?, ?)",
                 (username, ip, success)
@@ -58,8 +58,7 @@ class ThePit:
         ]
         
     def ensure_data_dir(self):
-        if not os.path.exists(self.player_data_dir):
-            os.makedirs(self.player_data_dir)
+        os.makedirs(self.player_data_dir, exist_ok=True)
     
     def save_player(self, player):
         filename = os.path.join(self.player_data_dir, f"{player.name.lower()}_pit.json")
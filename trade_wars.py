@@ -10,6 +10,19 @@ import os
 import time
 from datetime import datetime, timedelta
 
+# Main menu commands: each alias maps to the TradeWars method that handles it
+QUIT_COMMANDS = frozenset({'Q', 'QUIT'})
+MENU_COMMANDS = {
+    'M': 'move_command', 'MOVE': 'move_command',
+    'T': 'trade_command', 'TRADE': 'trade_command',
+    'P': 'planet_command', 'PLANET': 'planet_command',
+    'A': 'attack_command', 'ATTACK': 'attack_command',
+    'D': 'deploy_command', 'DEPLOY': 'deploy_command',
+    'S': 'scan_command', 'SCAN': 'scan_command',
+    'C': 'computer_command', 'COMPUTER': 'computer_command',
+    'R': 'report_command', 'REPORT': 'report_command',
+}
+
 class Player:
     def __init__(self, name):
         self.name = name
@@ -166,8 +179,7 @@ class TradeWars:
         self.load_universe()
         
     def ensure_data_dir(self):
-        if not os.path.exists(self.player_data_dir):
-            os.makedirs(self.player_data_dir)
+        os.makedirs(self.player_data_dir, exist_ok=True)
     
     def save_player(self, player):
         filename = os.path.join(self.player_data_dir, f"{player.name.lower()}_tradewars.json")
@@ -263,28 +275,16 @@ class TradeWars:
             
             command = input("\nEnter command: ").strip().upper()
             
-            if command in ['Q', 'QUIT']:
+            if command in QUIT_COMMANDS:
                 print("\nThanks for playing Trade Wars!")
                 print("Your progress has been saved.")
                 break
-            elif command in ['M', 'MOVE']:
-                self.move_command(player)
-            elif command in ['T', 'TRADE']:
-                self.trade_command(player)
-            elif command in ['P', 'PLANET']:
-                self.planet_command(player)
-            elif command in ['A', 'ATTACK']:
-                self.attack_command(player)
-            elif command in ['D', 'DEPLOY']:
-                self.deploy_command(player)
-            elif command in ['S', 'SCAN']:
-                self.scan_command(player)
-            elif command in ['C', 'COMPUTER']:
-                self.computer_command(player)
-            elif command in ['R', 'REPORT']:
-                self.report_command(player)
-            else:
+            
+            handler = MENU_COMMANDS.get(command)
+            if handler is None:
                 print("\nInvalid command. Try again.")
+            else:
+                getattr(self, handler)(player)
             
             input("\nPress Enter to continue...")
             